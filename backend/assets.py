@@ -0,0 +1,113 @@
+"""
+Fingerprinted, precompressed frontend assets.
+
+build() copies frontend/css and frontend/js into ASSETS_DIR under content-hashed
+names (js/app.3f2a9c1e07.js), writes a .gz (and a .br, if brotli is installed)
+next to each at maximum compression, and rewrites index.html to reference them.
+A hashed file never changes, so it is served with a one-year immutable
+Cache-Control and phones only download what changed since their last visit;
+index.html itself is revalidated on every load (a 304 when unchanged).
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from compression import accepts, brotli
+
+SOURCE_DIRS = ("css", "js")
+HASH_LENGTH = 10
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Best first; only the ones build() could write are tried
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+# Paths (relative to the output directory) of the files build() writes: only
+# these are ever removed, whatever else ALMNTSHN_ASSETS_DIR holds
+BUILT = re.compile(
+    rf"(?:(?:{'|'.join(SOURCE_DIRS)})/[^/]+\.[0-9a-f]{{{HASH_LENGTH}}}\.[^/.]+|index\.html)(?:\.br|\.gz)?"
+)
+
+
+def _compressed(data: bytes) -> dict[str, bytes]:
+    """Precompressed variants of data by file suffix, skipping any that don't help."""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items() if len(body) < len(data)}
+
+
+def _write(path: Path, data: bytes, written: set):
+    """Write path (unless it already holds data) and its compressed variants."""
+    for target, body in [(path, data), *((path.with_name(path.name + s), b) for s, b in _compressed(data).items())]:
+        written.add(target)
+        if target.is_file() and target.read_bytes() == body:
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, target)  # a running server never sees a half-written file
+
+
+def build(frontend_dir: Path, out_dir: Path) -> dict:
+    """Build out_dir from frontend_dir and remove files left from older builds
+    (hashed assets and index.html; other files in out_dir are left alone).
+
+    Returns the manifest, e.g. {"/js/app.js": "/assets/js/app.3f2a9c1e07.js"}.
+    """
+    if out_dir.resolve() == frontend_dir.resolve():
+        raise ValueError(f"The assets directory {out_dir} must not be the frontend directory")
+    manifest, written = {}, set()
+    for sub in SOURCE_DIRS:
+        for source in sorted((frontend_dir / sub).iterdir()):
+            if not source.is_file():
+                continue
+            data = source.read_bytes()
+            name = f"{sub}/{source.stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{source.suffix}"
+            _write(out_dir / name, data, written)
+            manifest[f"/{sub}/{source.name}"] = f"/assets/{name}"
+
+    html = (frontend_dir / "index.html").read_text()
+    for original, hashed in manifest.items():
+        html = html.replace(f'"{original}"', f'"{hashed}"')
+    _write(out_dir / "index.html", html.encode(), written)
+
+    for path in out_dir.rglob("*"):
+        if path.is_file() and path not in written and BUILT.fullmatch(path.relative_to(out_dir).as_posix()):
+            path.unlink()
+    return manifest
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles that serves a .br/.gz variant when the client accepts it, with
+    immutable caching for everything but index.html."""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        accept_encoding = request_headers.get("accept-encoding", "")
+        cache_control = REVALIDATE if os.path.basename(full_path) == "index.html" else IMMUTABLE
+        headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        path = full_path
+        for coding, suffix in ENCODINGS:
+            variant = f"{full_path}{suffix}"
+            if accepts(accept_encoding, coding) and os.path.isfile(variant):
+                path, stat_result = variant, os.stat(variant)
+                headers["Content-Encoding"] = coding  # also keeps CompressionMiddleware out
+                break
+
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers=headers,
+            media_type=mimetypes.guess_type(str(full_path))[0],
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
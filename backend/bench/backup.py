@@ -0,0 +1,166 @@
+"""
+Scan and adjust latency while an online backup of a large database runs.
+
+Seeds a database like bench.load (--items items with inventory) and pads its
+scan history until the file is --size-mb, starts the app with uvicorn in a
+subprocess and sends --rate requests per second, scans of known barcodes and
+quantity adjusts (--adjust-ratio), which write scan history and inventory
+throughout. After --baseline seconds without a backup it takes snapshots the
+way the app's schedule does (services.backups.create in a low-priority
+thread): in steps of ALMNTSHN_BACKUP_STEP_PAGES pages, in a single step, and in
+a single step at normal priority for comparison. Prints p50/p99/max latency of
+the requests that completed during each, with the backup's duration and how
+often writes restarted it. Then checks that the snapshots are complete copies.
+
+Usage:
+    cd backend && uv run python -m bench.backup [--size-mb 500] [--rate 40]
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from contextlib import closing
+
+import httpx
+
+from bench.load import BASE, percentile, seed, start_server
+from config import BACKUP_STEP_PAGES, BACKUP_STEP_PAUSE
+from database import DATABASE_PATH, SessionLocal
+from services import backups, rollups
+
+PAD_BATCH = 200_000  # scan history rows per insert
+
+
+def pad(size_mb: int, items: int):
+    """Add scan history rows until the database file is size_mb, all within the
+    retention period and folded into the rollups, as a long-used database's
+    would be (so the app doesn't spend its first minute compacting them)."""
+    with closing(sqlite3.connect(DATABASE_PATH)) as db:
+        while DATABASE_PATH.stat().st_size < size_mb * 1024 * 1024:
+            db.execute(f"""
+                WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {PAD_BATCH})
+                INSERT INTO scan_history (barcode, action, quantity, timestamp)
+                SELECT 10000000 + abs(random()) % {items}, 'check', 1,
+                       datetime('now', '-' || (abs(random()) % (86400 * 60)) || ' seconds')
+                FROM n
+            """)
+            db.commit()
+    with SessionLocal() as db:
+        rollups.refresh_rollups(db)
+    with closing(sqlite3.connect(DATABASE_PATH)) as db:
+        db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+async def traffic(args, samples: list, stop: asyncio.Event):
+    """Scans and adjusts arriving at --rate per second (whether or not earlier
+    ones have been answered, like phones) until stop is set; appends
+    (completed at, latency ms, kind) to samples."""
+    rng = random.Random(1)
+    limits = httpx.Limits(max_connections=256)
+    async with httpx.AsyncClient(base_url=BASE, timeout=30, limits=limits) as client:
+
+        async def send(kind: str, path: str, body: dict):
+            start = time.perf_counter()
+            try:
+                ok = (await client.post(path, json=body)).status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            end = time.perf_counter()
+            samples.append((end, (end - start) * 1000, kind if ok else "error"))
+
+        pending = set()
+        due = time.perf_counter()
+        while not stop.is_set():
+            due += rng.expovariate(args.rate)
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            barcode = str(10_000_000 + rng.randrange(args.items))
+            if rng.random() < args.adjust_ratio:
+                request = ("adjust", "/api/inventory/adjust", {"barcode": barcode, "delta": rng.choice([1, -1])})
+            else:
+                request = ("scan", "/api/inventory/scan", {"barcode": barcode})
+            task = asyncio.create_task(send(*request))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        await asyncio.gather(*pending)
+
+
+def report(name: str, samples: list, start: float, end: float, extra: str = ""):
+    window = [(latency, kind) for at, latency, kind in samples if start <= at <= end]
+    errors = sum(kind == "error" for _, kind in window)
+    line = f"  {name:26} {len(window) / (end - start):6.0f} req/s"
+    for kind in ("scan", "adjust"):
+        latencies = [latency for latency, k in window if k == kind]
+        if latencies:
+            line += (f"  {kind} p50 {statistics.median(latencies):5.1f} p99 {percentile(latencies, 0.99):6.1f} "
+                     f"max {max(latencies):6.1f} ms")
+    print(f"{line}  {errors} errors{extra}")
+    return errors
+
+
+async def run(args) -> bool:
+    samples, stop = [], asyncio.Event()
+    load = asyncio.create_task(traffic(args, samples, stop))
+    await asyncio.sleep(1)  # warm up
+    start = time.perf_counter()
+    await asyncio.sleep(args.baseline)
+    errors = report("no backup:", samples, start, time.perf_counter())
+
+    paths = []
+    runs = (
+        (f"backup, {BACKUP_STEP_PAGES}-page steps:", BACKUP_STEP_PAGES, backups.in_background),
+        ("backup, one step:", -1, backups.in_background),
+        ("  at normal priority:", -1, asyncio.to_thread),  # what the low-priority thread saves
+    )
+    for name, pages, run_in_thread in runs:
+        await asyncio.sleep(args.gap)
+        restarts = backups.stats["restarts"]
+        start = time.perf_counter()
+        paths.append(await run_in_thread(backups.create, step_pages=pages, step_pause=BACKUP_STEP_PAUSE))
+        end = time.perf_counter()
+        errors += report(name, samples, start, end,
+                         f", took {end - start:.1f}s, {backups.stats['restarts'] - restarts} restarts")
+    stop.set()
+    await load
+
+    ok = not errors
+    for path in paths:
+        with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as db:
+            items = db.execute("SELECT count(*) FROM items").fetchone()[0]
+        ok &= items == args.items
+    print(f"  snapshots of {backups.stats['last_bytes'] / 1024 / 1024:.0f} MiB passed quick_check, "
+          f"all {args.items} items in each: {'yes' if ok else 'NO'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request latency during online backups.")
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--size-mb", type=int, default=500, help="Database size, padded with scan history")
+    parser.add_argument("--rate", type=float, default=40, help="Requests per second")
+    parser.add_argument("--adjust-ratio", type=float, default=0.2)
+    parser.add_argument("--baseline", type=float, default=10, help="Seconds of traffic without a backup")
+    parser.add_argument("--gap", type=float, default=3, help="Seconds between the backups")
+    args = parser.parse_args()
+
+    seed(args.items, 500)
+    started = time.perf_counter()
+    pad(args.size_mb, args.items)
+    print(f"Padded the database to {DATABASE_PATH.stat().st_size / 1024 / 1024:.0f} MiB "
+          f"in {time.perf_counter() - started:.0f}s")
+    server = start_server()  # ALMNTSHN_BACKUP_INTERVAL would only start after 10 minutes anyway
+    try:
+        print(f"{args.items} items, {args.rate:g} requests/s, {args.adjust_ratio:.0%} adjusts, "
+              f"{BACKUP_STEP_PAUSE * 1000:g} ms between backup steps:")
+        ok = asyncio.run(run(args))
+    finally:
+        server.terminate()
+        server.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
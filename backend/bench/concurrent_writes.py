@@ -0,0 +1,190 @@
+"""
+Stress test of concurrent quantity changes: no lost or duplicated updates.
+
+Starts the app with uvicorn in a subprocess and, with --clients concurrent
+clients, sends:
+
+  1. --requests adjusts of +1 spread over a few hot items, each with its own
+     Idempotency-Key: every one must count;
+  2. the same number again, each sent twice with one key (half as a retry after
+     the answer, half as two racing copies): every key must count once;
+  3. quick-adds of a few barcodes the app doesn't know yet, racing to create
+     them: each must be created once, with every add counted;
+  4. a batch retried with its key, and removals past zero, which must clamp.
+
+Checks the final quantities against the number of distinct keys sent, reports
+throughput and latency per phase, and exits non-zero on any mismatch.
+
+Usage:
+    cd backend && uv run python -m bench.concurrent_writes [--clients 16] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+PORT = 8094
+BASE = f"http://127.0.0.1:{PORT}"
+HOT_ITEMS = [str(2_000_000 + i) for i in range(5)]
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def start_server() -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "ALMNTSHN_DATA_DIR": tempfile.mkdtemp(prefix="almntshn-bench-"),
+        "ALMNTSHN_OFF_LOOKUP_MODE": "offline",  # new items get "Unknown (...)" names, no network
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env,
+    )
+    for _ in range(200):
+        try:
+            httpx.get(f"{BASE}/health")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+async def send_all(client: httpx.AsyncClient, requests: list, clients: int) -> tuple[list[float], int]:
+    """Send (path, body, key) requests with `clients` in flight; returns latencies and failures."""
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    latencies, failures = [], 0
+
+    async def worker():
+        nonlocal failures
+        while not queue.empty():
+            path, body, key = queue.get_nowait()
+            headers = {"Idempotency-Key": key} if key else {}
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body, headers=headers)
+                error = None if response.status_code == 200 else f"{response.status_code}: {response.text[:200]}"
+            except httpx.TransportError as e:  # e.g. the connection dropped; counted, not fatal
+                error = f"{type(e).__name__}: {e}"
+            latencies.append((time.perf_counter() - start) * 1000)
+            if error:
+                failures += 1
+                if failures <= 5:
+                    print(f"    {path} -> {error}")
+
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return latencies, failures
+
+
+async def quantities(client: httpx.AsyncClient) -> dict:
+    response = await client.get("/api/inventory/", params={"limit": 1000})
+    return {row["item"]["barcode"]: row["quantity"] for row in response.json()}
+
+
+def report(name: str, latencies: list[float], elapsed: float, failures: int):
+    print(f"  {name:28} {len(latencies) / elapsed:7.0f} req/s, p50 {statistics.median(latencies):6.1f} ms, "
+          f"p99 {percentile(latencies, 0.99):6.1f} ms, {failures} failed")
+
+
+async def run(clients: int, requests: int) -> bool:
+    rng = random.Random(1)
+    ok, failed = True, 0
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=BASE, timeout=60, limits=limits) as client:
+        for barcode in HOT_ITEMS:
+            await client.post("/api/items/", json={"barcode": barcode, "name": f"Hot item {barcode}"})
+        expected = dict.fromkeys(HOT_ITEMS, 0)
+
+        # 1. unique keys: every adjust counts
+        phase = []
+        for _ in range(requests):
+            barcode = rng.choice(HOT_ITEMS)
+            expected[barcode] += 1
+            phase.append(("/api/inventory/adjust", {"barcode": barcode, "delta": 1}, str(uuid.uuid4())))
+        start = time.perf_counter()
+        latencies, failures = await send_all(client, phase, clients)
+        report("adjust, unique keys:", latencies, time.perf_counter() - start, failures)
+        failed += failures
+
+        # 2. every key sent twice: two copies racing, or a retry after the answer
+        phase, retries = [], []
+        for n in range(requests):
+            barcode = rng.choice(HOT_ITEMS)
+            expected[barcode] += 1
+            request = ("/api/inventory/adjust", {"barcode": barcode, "delta": 1}, str(uuid.uuid4()))
+            if n % 2:
+                phase += [request, request]  # adjacent in the queue, so usually in flight together
+            else:
+                phase.append(request)
+                retries.append(request)  # sent again at the end, after the first answer
+        start = time.perf_counter()
+        latencies, failures = await send_all(client, phase + retries, clients)
+        report("adjust, every key twice:", latencies, time.perf_counter() - start, failures)
+        failed += failures
+
+        # 3. racing to create new items
+        new_barcodes = [str(3_000_000 + i) for i in range(5)]
+        phase = [("/api/inventory/quick-add", {"barcode": rng.choice(new_barcodes)}, str(uuid.uuid4()))
+                 for _ in range(requests // 4)]
+        for _, body, _ in phase:
+            expected[body["barcode"]] = expected.get(body["barcode"], 0) + 1
+        start = time.perf_counter()
+        latencies, failures = await send_all(client, phase, clients)
+        report("quick-add of new items:", latencies, time.perf_counter() - start, failures)
+        failed += failures  # e.g. a unique constraint error from two phones creating one item
+
+        # 4. a retried batch counts once, and removals clamp at zero
+        batch = {"operations": [{"barcode": barcode, "delta": 2} for barcode in HOT_ITEMS]}
+        for barcode in HOT_ITEMS:
+            expected[barcode] += 2
+        key = str(uuid.uuid4())
+        _, failures = await send_all(client, [("/api/inventory/batch", batch, key)] * 4, 4)
+        failed += failures
+        clamp_barcode = new_barcodes[0]
+        drain = [("/api/inventory/adjust", {"barcode": clamp_barcode, "delta": -1}, None)
+                 for _ in range(expected[clamp_barcode] + 20)]
+        _, failures = await send_all(client, drain, clients)
+        failed += failures
+        expected[clamp_barcode] = 0
+
+        final = await quantities(client)
+        for barcode, count in sorted(expected.items()):
+            if final.get(barcode) != count:
+                print(f"  MISMATCH {barcode}: expected {count}, got {final.get(barcode)}")
+                ok = False
+        print(f"  final quantities match the distinct keys sent: {'yes' if ok else 'NO'}")
+    return ok and not failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="Adjusts per phase")
+    args = parser.parse_args()
+
+    server = start_server()
+    try:
+        print(f"{args.clients} concurrent clients, {args.requests} adjusts per phase:")
+        ok = asyncio.run(run(args.clients, args.requests))
+    finally:
+        server.terminate()
+        server.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
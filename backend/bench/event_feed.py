@@ -0,0 +1,172 @@
+"""
+Load test of the /api/events change feed.
+
+Starts the app with uvicorn in a subprocess, then times --writes quantity
+adjustments with no subscribers and again with --subscribers SSE clients
+connected (plus --stalled clients that never read their stream). Subscribers
+run in their own process so they don't compete with the writer for its event
+loop. Reports write latency for both runs and how long each event took to
+reach the subscribers, and checks that every subscriber saw every change.
+
+Usage:
+    cd backend && uv run python -m bench.event_feed [--subscribers 300] [--writes 200]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+PORT = 8097
+BASE = f"http://127.0.0.1:{PORT}"
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def cpu_seconds(pid: int) -> float:
+    """User + system CPU time of a process so far (Linux)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_server() -> subprocess.Popen:
+    env = {**os.environ, "ALMNTSHN_DATA_DIR": tempfile.mkdtemp(prefix="almntshn-bench-")}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"{BASE}/api/stats/cache")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+async def timed_writes(client: httpx.AsyncClient, writes: int, sent: list) -> list[float]:
+    samples = []
+    for _ in range(writes):
+        sent.append(time.time())  # compared with receive times in the subscriber process
+        start = time.perf_counter()
+        response = await client.post("/api/inventory/adjust", json={"barcode": "1000", "delta": 1})
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+    return samples
+
+
+async def subscriber(ready: asyncio.Event, received: list):
+    """A minimal SSE client on a raw socket, so the subscribers' own parsing
+    costs as little CPU as possible next to the server's."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    writer.write(f"GET /api/events/ HTTP/1.1\r\nHost: 127.0.0.1:{PORT}\r\n\r\n".encode())
+    try:
+        while data := await reader.read(65536):
+            if b"retry:" in data:
+                ready.set()
+            now = time.time()
+            received.extend([now] * data.count(b"event: change"))
+    finally:
+        writer.close()
+
+
+def stall(count: int) -> list[socket.socket]:
+    """Clients that open the stream and never read from it."""
+    sockets = []
+    for _ in range(count):
+        s = socket.create_connection(("127.0.0.1", PORT))
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        s.sendall(f"GET /api/events/ HTTP/1.1\r\nHost: 127.0.0.1:{PORT}\r\n\r\n".encode())
+        sockets.append(s)
+    return sockets
+
+
+async def subscribe_all(subscribers: int, stalled: int, ready, done, results):
+    readies = [asyncio.Event() for _ in range(subscribers)]
+    received = [[] for _ in range(subscribers)]
+    tasks = [asyncio.create_task(subscriber(r, rec)) for r, rec in zip(readies, received)]
+    await asyncio.wait_for(asyncio.gather(*(r.wait() for r in readies)), 30)
+    stalled_sockets = stall(stalled)
+    ready.set()
+    await asyncio.to_thread(done.wait)
+    await asyncio.sleep(1)  # let the last events arrive
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for s in stalled_sockets:
+        s.close()
+    results.put(received)
+
+
+def subscriber_process(subscribers: int, stalled: int, ready, done, results):
+    asyncio.run(subscribe_all(subscribers, stalled, ready, done, results))
+
+
+async def run(server_pid: int, subscribers: int, stalled: int, writes: int) -> bool:
+    async with httpx.AsyncClient(base_url=BASE, timeout=30) as client:
+        await client.post("/api/items/", json={"barcode": "1000", "name": "Bench item"})
+
+        cpu = cpu_seconds(server_pid)
+        baseline = await timed_writes(client, writes, [])
+        baseline_cpu = (cpu_seconds(server_pid) - cpu) / writes * 1000
+
+        ready, done, results = multiprocessing.Event(), multiprocessing.Event(), multiprocessing.Queue()
+        listeners = multiprocessing.Process(
+            target=subscriber_process, args=(subscribers, stalled, ready, done, results)
+        )
+        listeners.start()
+        await asyncio.to_thread(ready.wait, 60)
+
+        sent = []
+        cpu = cpu_seconds(server_pid)
+        loaded = await timed_writes(client, writes, sent)
+        loaded_cpu = (cpu_seconds(server_pid) - cpu) / writes * 1000
+        done.set()
+        received = await asyncio.to_thread(results.get)
+        listeners.join()
+
+    lags = [(r - s) * 1000 for rec in received for r, s in zip(rec, sent)]
+    complete = sum(len(rec) == writes for rec in received)
+    for name, samples, cpu in [("no subscribers", baseline, baseline_cpu), (f"{subscribers} subscribers", loaded, loaded_cpu)]:
+        print(
+            f"  writes, {name + ':':16} p50 {statistics.median(samples):6.2f} ms, "
+            f"p99 {percentile(samples, 0.99):6.2f} ms, server CPU {cpu:.2f} ms/write"
+        )
+    print(f"  event delivery:         p50 {statistics.median(lags):6.2f} ms, p99 {percentile(lags, 0.99):6.2f} ms")
+    print(f"  subscribers that got all {writes} events: {complete}/{subscribers}")
+    return complete == subscribers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=300)
+    parser.add_argument("--stalled", type=int, default=20, help="Subscribers that never read")
+    parser.add_argument("--writes", type=int, default=200)
+    args = parser.parse_args()
+
+    server = start_server()
+    try:
+        print(f"{args.writes} adjusts, {args.subscribers} SSE subscribers + {args.stalled} stalled:")
+        ok = asyncio.run(run(server.pid, args.subscribers, args.stalled, args.writes))
+    finally:
+        server.terminate()
+        server.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
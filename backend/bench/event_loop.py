@@ -0,0 +1,88 @@
+"""
+Measure how database work in the scan endpoints affects other requests.
+
+While another connection holds the SQLite write lock (a stand-in for a slow
+write), fires concurrent /api/inventory/scan requests and polls /health every
+10 ms, reporting /health latency measured from when each poll was due. If scan
+handlers block the event loop, /health stalls for as long as the lock is held.
+
+Usage:
+    cd backend && uv run python -m bench.event_loop [--lock-ms 1000] [--scans 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("ALMNTSHN_DATA_DIR", tempfile.mkdtemp(prefix="almntshn-bench-"))
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from database import DATA_DIR, SessionLocal  # noqa: E402
+from models import Item, Inventory  # noqa: E402
+
+main.prepare()  # data directory, schema, search index and change-tracking triggers
+
+
+def seed():
+    with SessionLocal() as db:
+        item = Item(barcode="5000000000001", name="Oats", category="en:cereals")
+        db.add(item)
+        db.flush()
+        db.add(Inventory(item_id=item.id, quantity=3))
+        db.commit()
+
+
+def hold_write_lock(seconds: float, locked: threading.Event):
+    conn = sqlite3.connect(DATA_DIR / "inventory.db")
+    conn.execute("BEGIN IMMEDIATE")
+    locked.set()
+    time.sleep(seconds)
+    conn.commit()
+    conn.close()
+
+
+async def run(lock_ms: float, scans: int):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        locked = threading.Event()
+        locker = threading.Thread(target=hold_write_lock, args=(lock_ms / 1000, locked))
+        locker.start()
+        locked.wait()
+
+        scan_tasks = [
+            asyncio.create_task(client.post("/api/inventory/scan", json={"barcode": "5000000000001"}))
+            for _ in range(scans)
+        ]
+        health = []
+        due = time.perf_counter()
+        while not all(t.done() for t in scan_tasks):
+            await client.get("/health")
+            health.append((time.perf_counter() - due) * 1000)
+            due += 0.01
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+        await asyncio.gather(*scan_tasks)
+        locker.join()
+
+    print(f"{scans} scans while the write lock was held for {lock_ms:.0f} ms")
+    print(
+        f"/health: {len(health)} polls, p50 {statistics.median(health):.1f} ms, "
+        f"max {max(health):.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Event-loop blocking benchmark.")
+    parser.add_argument("--lock-ms", type=float, default=1000)
+    parser.add_argument("--scans", type=int, default=20)
+    args = parser.parse_args()
+
+    seed()
+    asyncio.run(run(args.lock_ms, args.scans))
@@ -0,0 +1,188 @@
+"""
+Product image proxy: first fetch vs cached latency, thumbnail size and eviction.
+
+Generates --images distinct 800x800 JPEG product photos, serves them from the
+stub Open Food Facts server (--off-latency-ms), starts the app with uvicorn in
+a subprocess and, with --concurrency clients, requests every thumbnail, which
+is fetched from the stub and resized, then the last --warm ones again, which
+come from the disk cache. The cache (--cache-mb) is smaller than all the
+thumbnails, so it has to evict along the way. Then checks that an ETag
+revalidation is a 304, that concurrent requests for a new image fetch it once,
+that item responses point at the proxy, and that the cache stayed under its
+limit.
+
+Usage:
+    cd backend && uv run python -m bench.images [--images 300] [--warm 100] [--cache-mb 2]
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+import httpx
+
+from bench.stub_off import start_in_thread
+
+PORT = 8093
+OFF_PORT = 8092
+BASE = f"http://127.0.0.1:{PORT}"
+
+
+def make_images(count: int) -> dict:
+    from PIL import Image
+
+    rng = random.Random(0)
+    images = {}
+    for i in range(count):
+        photo = Image.radial_gradient("L").resize((800, 800)).convert("RGB")
+        noise = Image.effect_noise((200, 200), 60).resize((800, 800), Image.NEAREST).convert("RGB")  # detail that survives resizing
+        tint = Image.new("RGB", (800, 800), tuple(rng.randrange(256) for _ in range(3)))
+        photo = Image.blend(Image.blend(photo, tint, 0.5), noise, 0.3)
+        out = io.BytesIO()
+        photo.save(out, "JPEG", quality=85)
+        images[str(4_000_000 + i)] = out.getvalue()
+    return images
+
+
+def start_server(data_dir: str, cache_mb: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "ALMNTSHN_DATA_DIR": data_dir,
+        "ALMNTSHN_OFF_BASE_URL": f"http://127.0.0.1:{OFF_PORT}",  # its host is an allowed image host
+        "ALMNTSHN_IMAGE_CACHE_MAX_MB": str(cache_mb),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env,
+    )
+    for _ in range(200):
+        try:
+            httpx.get(f"{BASE}/health")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def thumb_path(barcode: str) -> str:
+    return "/api/images/thumb?src=" + quote(f"http://127.0.0.1:{OFF_PORT}/images/{barcode}.jpg", safe="")
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def fetch_all(client: httpx.AsyncClient, paths: list[str], concurrency: int) -> tuple[list[float], list[int]]:
+    """Latencies (ms) and body sizes of GETs of paths, `concurrency` at a time."""
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    latencies, sizes = [], []
+
+    async def worker():
+        while not queue.empty():
+            path = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} -> {response.status_code}")
+            sizes.append(len(response.content))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, sizes
+
+
+def summary(latencies: list[float], elapsed: float) -> str:
+    return (f"{len(latencies) / elapsed:7.0f} req/s, p50 {statistics.median(latencies):6.1f} ms, "
+            f"p99 {percentile(latencies, 0.99):6.1f} ms")
+
+
+async def run(stub, images: dict, args, data_dir: str) -> bool:
+    ok = True
+    barcodes = sorted(images)[:-1]  # the last one is kept for the single-flight check
+    paths = [thumb_path(barcode) for barcode in barcodes]
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=BASE, timeout=60, limits=limits) as client:
+        stub.requests = 0
+        start = time.perf_counter()
+        cold, sizes = await fetch_all(client, paths, args.concurrency)
+        print(f"  first fetch (stub + resize): {summary(cold, time.perf_counter() - start)}")
+        fetched = stub.requests
+
+        start = time.perf_counter()
+        warm, _ = await fetch_all(client, paths[-args.warm:], args.concurrency)
+        print(f"  cached:                      {summary(warm, time.perf_counter() - start)}")
+        source = statistics.mean(len(images[barcode]) for barcode in barcodes)
+        print(f"  size: {source / 1024:.0f} KiB source -> {statistics.mean(sizes) / 1024:.1f} KiB thumbnail")
+        print(f"  source fetches: {fetched} for {len(paths)} images, then {stub.requests - fetched} "
+              f"for the last {args.warm} again")
+        ok &= fetched == len(paths) and stub.requests == fetched
+
+        response = await client.get(paths[0])
+        revalidated = await client.get(paths[0], headers={"If-None-Match": response.headers["etag"]})
+        print(f"  revalidation with ETag: {revalidated.status_code}, Cache-Control: {response.headers['cache-control']}")
+        ok &= revalidated.status_code == 304
+
+        before = stub.requests
+        path = thumb_path(sorted(images)[-1])
+        await asyncio.gather(*(client.get(path) for _ in range(20)))
+        print(f"  20 concurrent requests for a new image: {stub.requests - before} source fetch")
+        ok &= stub.requests - before == 1
+
+        created = await client.post("/api/inventory/quick-add", json={"barcode": barcodes[0]})
+        listed = await client.get("/api/inventory/", params={"fields": "item.image_url"})
+        print(f"  image_url in responses: {created.json()['item']['image_url'][:40]}..., "
+              f"projected {listed.json()[0]['item']['image_url'][:40]}...")
+        ok &= created.json()["item"]["image_url"] == listed.json()[0]["item"]["image_url"] == paths[0]
+
+        cache = (await client.get("/api/stats/cache")).json()["images"]
+        on_disk = sum(p.stat().st_size for p in (Path(data_dir) / "images" / "objects").glob("*/*"))
+        print(f"  cache: {on_disk / 1024 / 1024:.2f} MiB on disk (limit {args.cache_mb} MiB), "
+              f"{cache['evictions']} evictions")
+        ok &= on_disk <= args.cache_mb * 1024 * 1024
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Product image proxy benchmark.")
+    parser.add_argument("--images", type=int, default=300)
+    parser.add_argument("--warm", type=int, default=100, help="Recent images to request again")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--off-latency-ms", type=float, default=100)
+    parser.add_argument("--cache-mb", type=int, default=2, help="Small enough that eviction is exercised")
+    args = parser.parse_args()
+
+    try:
+        images = make_images(args.images + 1)
+    except ImportError:
+        print("Pillow is not installed (uv sync --extra speedups); nothing to benchmark")
+        sys.exit(1)
+    stub, off_server = start_in_thread(OFF_PORT, args.off_latency_ms, images)
+    data_dir = tempfile.mkdtemp(prefix="almntshn-bench-")
+    server = start_server(data_dir, args.cache_mb)
+    try:
+        print(f"{args.images} images, {args.concurrency} clients, OFF latency {args.off_latency_ms:g} ms:")
+        ok = asyncio.run(run(stub, images, args, data_dir))
+    finally:
+        server.terminate()
+        server.wait()
+        off_server.should_exit = True
+    if not ok:
+        print("FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
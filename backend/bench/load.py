@@ -0,0 +1,235 @@
+"""
+Load test of the API hot paths, with machine-readable results.
+
+Seeds a fresh database with --items items (with inventory), starts the stub
+Open Food Facts server (--off-latency-ms) and the app with uvicorn in a
+subprocess, then runs each scenario for --duration seconds with --concurrency
+clients:
+
+    scan       POST /inventory/scan, known barcodes plus --unknown-ratio new ones (OFF)
+    quick-add  POST /inventory/quick-add of known barcodes
+    adjust     POST /inventory/adjust by +1/-1
+    list       GET /inventory/ pages of 50, at random sort orders
+    search     GET /inventory/?search=<word prefix>
+    mixed      all of the above, weighted like a scanning session
+
+Prints throughput and p50/p95/p99 latency per scenario and writes them as JSON
+(with the commit and settings) to --output. Pass --compare with an earlier
+results file to print the change per scenario. Requests are drawn from
+--seed, so runs at different commits send the same traffic.
+
+Usage:
+    cd backend && uv run python -m bench.load [--items 20000] [--duration 10] [--concurrency 16]
+        [--output load.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+os.environ["ALMNTSHN_DATA_DIR"] = tempfile.mkdtemp(prefix="almntshn-bench-")
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from bench.stub_off import start_in_thread  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from models import Item, Inventory  # noqa: E402
+
+PORT = 8096
+OFF_PORT = 8095
+BASE = f"http://127.0.0.1:{PORT}"
+
+WORDS = ["apple", "bean", "butter", "cheese", "chili", "cocoa", "coffee", "corn", "flour", "honey",
+         "lemon", "lentil", "milk", "oat", "olive", "pasta", "pepper", "rice", "salt", "sugar",
+         "tea", "tomato", "tuna", "vinegar", "yogurt"]
+BRANDS = ["Acme", "Baxter", "Cordoba", "Dunmore", "Elmwood", "Fairfield", "Greenway", "Harbor"]
+MIXED_WEIGHTS = {"scan": 50, "quick-add": 15, "adjust": 15, "list": 10, "search": 10}
+SCENARIOS = list(MIXED_WEIGHTS) + ["mixed"]
+
+
+def seed(items: int, categories: int):
+    """Schema via the app's own startup code, then items with realistic-ish names."""
+    import main
+
+    main.prepare()  # tables, indexes, search index and triggers
+
+    rng = random.Random(0)
+    with SessionLocal() as db:
+        db.execute(insert(Item), [
+            {
+                "barcode": str(10_000_000 + i),
+                "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+                "brand": rng.choice(BRANDS),
+                "category": f"en:category-{i % categories}",
+            }
+            for i in range(items)
+        ])
+        db.execute(insert(Inventory), [{"item_id": i + 1, "quantity": i % 4} for i in range(items)])
+        db.commit()
+    engine.dispose()
+
+
+def start_server() -> subprocess.Popen:
+    env = {**os.environ, "ALMNTSHN_OFF_BASE_URL": f"http://127.0.0.1:{OFF_PORT}"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env,
+    )
+    for _ in range(200):
+        try:
+            httpx.get(f"{BASE}/health")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def make_request(scenario: str, rng: random.Random, items: int, unknown_ratio: float) -> tuple:
+    """(method, path, json body, query params) for one request of a scenario."""
+    if scenario == "mixed":
+        scenario = rng.choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+    known = str(10_000_000 + rng.randrange(items))
+    if scenario == "scan":
+        # new barcodes are looked up in (stub) OFF; never starting with "0", so they're found
+        barcode = str(rng.randrange(10**12, 10**13)) if rng.random() < unknown_ratio else known
+        return "POST", "/api/inventory/scan", {"barcode": barcode}, None
+    if scenario == "quick-add":
+        return "POST", "/api/inventory/quick-add", {"barcode": known}, None
+    if scenario == "adjust":
+        return "POST", "/api/inventory/adjust", {"barcode": known, "delta": rng.choice([1, -1])}, None
+    if scenario == "list":
+        params = {"limit": 50, "sort": rng.choice(["name", "updated_at", "quantity"]), "desc": rng.random() < 0.5}
+        return "GET", "/api/inventory/", None, params
+    return "GET", "/api/inventory/", None, {"limit": 50, "search": rng.choice(WORDS)[:3]}
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def client_loop(client, scenario, rng, deadline, args, latencies, errors):
+    while time.perf_counter() < deadline:
+        method, path, body, params = make_request(scenario, rng, args.items, args.unknown_ratio)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body, params=params)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            errors.append(path)
+
+
+async def run_scenario(scenario: str, args, seed: int) -> dict:
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=BASE, timeout=30, limits=limits) as client:
+        deadline = time.perf_counter() + args.duration
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            client_loop(client, scenario, random.Random(f"{seed}-{scenario}-{n}"), deadline, args, latencies, errors)
+            for n in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+    if not latencies:
+        return {"requests": 0, "errors": len(errors)}
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict, baseline: dict = None):
+    print(f"{'scenario':10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for scenario, r in results.items():
+        if not r["requests"]:
+            print(f"{scenario:10} {'-':>8} {'-':>8} {'-':>8} {'-':>8} {r['errors']:7}")
+            continue
+        print(f"{scenario:10} {r['throughput_rps']:8.1f} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} "
+              f"{r['p99_ms']:8.2f} {r['errors']:7}")
+        old = (baseline or {}).get(scenario)
+        if old and old.get("requests"):
+            change = {key: (r[key] - old[key]) / old[key] * 100 if old[key] else 0
+                      for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")}
+            print(f"{'  vs base':10} " + " ".join(f"{change[key]:+7.1f}%" for key in change))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--categories", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--off-latency-ms", type=float, default=100)
+    parser.add_argument("--unknown-ratio", type=float, default=0.05, help="Share of scans of new barcodes")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    seed(args.items, args.categories)
+    _, off_server = start_in_thread(OFF_PORT, args.off_latency_ms)
+    server = start_server()
+    try:
+        results = {}
+        for scenario in scenarios:
+            results[scenario] = asyncio.run(run_scenario(scenario, args, args.seed))
+    finally:
+        server.terminate()
+        server.wait()
+        off_server.should_exit = True
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print(f"{args.items} items, {args.concurrency} clients, {args.duration:g} s per scenario, "
+          f"OFF latency {args.off_latency_ms:g} ms (commit {report['commit']}):")
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
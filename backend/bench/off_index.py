@@ -0,0 +1,135 @@
+"""
+Build the local OFF index from a synthetic dump and time lookups against it.
+
+Writes a JSONL and a CSV dump of --products fake products (gzipped, in the
+official dumps' layouts), indexes each with scripts/import_off_dump.py, checks
+that lookup_barcode() in offline mode returns the same fields the API mapping
+produces, and reports index build time and lookup latency. Exits non-zero on
+any mismatch.
+
+Usage:
+    cd backend && uv run python -m bench.off_index [--products 50000] [--lookups 20000]
+"""
+
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("ALMNTSHN_DATA_DIR", tempfile.mkdtemp(prefix="almntshn-bench-"))
+os.environ["ALMNTSHN_OFF_LOOKUP_MODE"] = "offline"
+
+from config import DATA_DIR, OFF_INDEX_PATH  # noqa: E402
+from database import engine, Base  # noqa: E402
+import models  # noqa: E402,F401 - registers tables on Base
+from services import off_index  # noqa: E402
+from services.openfoodfacts import lookup_barcode, product_info  # noqa: E402
+
+CATEGORIES = ["en:plant-based-foods", "en:cereals-and-potatoes", "en:breakfast-cereals", "en:dairies",
+              "en:cheeses", "en:beverages", "en:sodas", "en:snacks", "en:sweet-snacks", "en:biscuits"]
+CSV_FIELDS = ["code", "url", "product_name", "brands", "categories_tags", "quantity",
+              "image_url", "image_small_url"]
+
+
+def fake_product(i: int) -> dict:
+    tags = sorted(random.sample(CATEGORIES, random.randint(0, 4)))
+    return {
+        "code": str(3_000_000_000_000 + i),
+        "product_name": f"Product {i}" if i % 10 else "",  # some nameless, as in the real dump
+        "brands": f"Brand {i % 500}",
+        "categories_tags": tags,
+        "quantity": f"{random.choice([100, 250, 500])} g",
+        "image_url": f"https://images.openfoodfacts.org/images/products/{i}/front_en.400.jpg",
+        "image_front_small_url": f"https://images.openfoodfacts.org/images/products/{i}/front_en.200.jpg",
+    }
+
+
+def write_dumps(products: list[dict], directory: Path) -> tuple[Path, Path]:
+    jsonl = directory / "products.jsonl.gz"
+    with gzip.open(jsonl, "wt", encoding="utf-8") as f:
+        for product in products:
+            f.write(json.dumps(product) + "\n")
+
+    tsv = directory / "products.csv.gz"
+    with gzip.open(tsv, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t")
+        writer.writerow(CSV_FIELDS)
+        for p in products:
+            writer.writerow([p["code"], "", p["product_name"], p["brands"], ",".join(p["categories_tags"]),
+                             p["quantity"], p["image_url"], p["image_front_small_url"]])
+    return jsonl, tsv
+
+
+def build(dump: Path) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "scripts/import_off_dump.py", str(dump)], check=True)
+    return time.perf_counter() - start
+
+
+def expected(product: dict) -> dict:
+    return {key: value or None for key, value in product_info(product).items()}
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def check_and_time(products: list[dict], lookups: int) -> bool:
+    ok = True
+    for product in random.sample(products, min(1000, len(products))):
+        found = await lookup_barcode(product["code"])
+        if found != expected(product):
+            print(f"  MISMATCH for {product['code']}: {found} != {expected(product)}")
+            ok = False
+    if await lookup_barcode("0000000000000") is not None:
+        print("  unknown barcode was found")
+        ok = False
+
+    codes = [random.choice(products)["code"] for _ in range(lookups)]
+    for name, lookup in [("off_index.get", off_index.get), ("lookup_barcode", None)]:
+        samples = []
+        for code in codes:
+            start = time.perf_counter()
+            if lookup:
+                lookup(code)
+            else:
+                await lookup_barcode(code)
+            samples.append((time.perf_counter() - start) * 1e6)
+        print(f"  {name + ':':16} p50 {statistics.median(samples):6.1f} us, p99 {percentile(samples, 0.99):6.1f} us")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)  # product_cache, consulted on index misses
+    random.seed(1)
+    products = [fake_product(i) for i in range(args.products)]
+    jsonl, tsv = write_dumps(products, DATA_DIR)
+
+    ok = True
+    for dump in (jsonl, tsv):
+        print(f"{dump.name} ({dump.stat().st_size / 1e6:.1f} MB):")
+        elapsed = build(dump)
+        print(f"  build: {elapsed:.1f}s, index {OFF_INDEX_PATH.stat().st_size / 1e6:.1f} MB")
+        ok = asyncio.run(check_and_time(products, args.lookups)) and ok
+
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
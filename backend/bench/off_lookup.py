@@ -0,0 +1,71 @@
+"""
+Benchmark OFF lookups against the local stub: a fresh client per lookup (the
+old behaviour) vs the shared pooled client, and request coalescing for
+concurrent scans of one barcode.
+
+Usage:
+    cd backend && uv run python -m bench.off_lookup [--lookups 50] [--latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+PORT = 8099
+os.environ.setdefault("ALMNTSHN_OFF_BASE_URL", f"http://127.0.0.1:{PORT}")
+os.environ.setdefault("ALMNTSHN_DATA_DIR", tempfile.mkdtemp(prefix="almntshn-bench-"))
+
+import httpx  # noqa: E402
+
+from bench.stub_off import start_in_thread  # noqa: E402
+from config import OFF_BASE_URL  # noqa: E402
+from database import engine, Base  # noqa: E402
+from services import openfoodfacts  # noqa: E402
+
+
+async def fetch_with_new_client(barcode: str):
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        response = await client.get(f"{OFF_BASE_URL}/api/v0/product/{barcode}.json")
+        response.raise_for_status()
+
+
+async def timed(fn, barcodes) -> list[float]:
+    samples = []
+    for barcode in barcodes:
+        start = time.perf_counter()
+        await fn(barcode)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summary(samples: list[float]) -> str:
+    return f"mean {statistics.mean(samples):.2f} ms, p50 {statistics.median(samples):.2f} ms"
+
+
+async def run(lookups: int, concurrency: int):
+    barcodes = [str(1000 + i) for i in range(lookups)]
+
+    print(f"Sequential lookups of {lookups} distinct barcodes:")
+    print(f"  new client per lookup: {summary(await timed(fetch_with_new_client, barcodes))}")
+    print(f"  shared pooled client:  {summary(await timed(openfoodfacts.fetch_product, barcodes))}")
+
+    before = stub.requests
+    await asyncio.gather(*(openfoodfacts.lookup_barcode("4242", refresh=True) for _ in range(concurrency)))
+    print(f"\n{concurrency} concurrent lookups of one barcode -> {stub.requests - before} OFF request(s)")
+
+    await openfoodfacts.close_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    stub, _ = start_in_thread(PORT, args.latency_ms)
+    asyncio.run(run(args.lookups, args.concurrency))
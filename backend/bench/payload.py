@@ -0,0 +1,125 @@
+"""
+Payload size and serialization time of the inventory list for 10k rows.
+
+Compares the stdlib json and orjson encoders on the full response model, a
+`fields=` projection, and gzip/brotli compression of each body, then times
+the whole request through the app with and without compression.
+
+Usage:
+    cd backend && uv run python -m bench.payload [--rows 10000]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+os.environ.setdefault("ALMNTSHN_DATA_DIR", tempfile.mkdtemp(prefix="almntshn-bench-"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+import main  # noqa: E402
+from compression import brotli  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from models import Item, Inventory  # noqa: E402
+from responses import orjson, parse_fields, project  # noqa: E402
+from schemas import InventoryResponse  # noqa: E402
+
+main.prepare()  # data directory, schema, search index and change-tracking triggers
+
+FIELDS = "item_id,quantity,item.name,item.brand,item.image_url"
+
+
+def seed(rows: int):
+    with SessionLocal() as db:
+        db.execute(insert(Item), [
+            {
+                "barcode": str(20_000_000 + i),
+                "name": f"Organic Peanut Butter Crunchy {i}",
+                "brand": f"Brand {i % 300}",
+                "category": f"en:category-{i % 50}",
+                "image_url": f"https://images.openfoodfacts.org/images/products/{i}/front_en.200.jpg",
+            }
+            for i in range(rows)
+        ])
+        db.execute(insert(Inventory), [{"item_id": i + 1, "quantity": i % 7, "location": "pantry"} for i in range(rows)])
+        db.commit()
+
+
+def best_of(fn, repeat: int = 5) -> tuple[float, object]:
+    """Fastest of repeat runs in ms, and the result."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times), result
+
+
+def sizes(body: bytes) -> str:
+    out = f"{len(body) / 1024:7.0f} KB raw, {len(gzip.compress(body, 6)) / 1024:5.0f} KB gzip"
+    if brotli is not None:
+        out += f", {len(brotli.compress(body, quality=4)) / 1024:5.0f} KB br"
+    return out
+
+
+def serialization(rows: int):
+    adapter = TypeAdapter(List[InventoryResponse])
+    spec = parse_fields(FIELDS, InventoryResponse)
+    with SessionLocal() as db:
+        inventory = db.query(Inventory).options(joinedload(Inventory.item)).order_by(Inventory.id).all()
+
+        model_ms, data = best_of(lambda: adapter.dump_python(adapter.validate_python(inventory), mode="json"))
+        cases = [("model + json", lambda: json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode())]
+        if orjson is not None:
+            cases.append(("model + orjson", lambda: orjson.dumps(data)))
+        print(f"{rows} rows, validating and dumping the response model: {model_ms:.0f} ms")
+        for name, encode in cases:
+            ms, body = best_of(encode)
+            print(f"  {name + ':':22} {model_ms + ms:6.0f} ms, {sizes(body)}")
+
+        dumps = orjson.dumps if orjson is not None else (lambda c: json.dumps(c, default=str).encode())
+        ms, body = best_of(lambda: dumps([project(row, spec) for row in inventory]))
+        print(f"  {'fields=' + FIELDS + ':':22}\n  {'':22} {ms:6.0f} ms, {sizes(body)}")
+
+
+def end_to_end(rows: int):
+    print(f"GET /api/inventory/?limit={rows} through the app (median of 5):")
+    with TestClient(main.app) as client:
+        for name, url, encoding in [
+            ("identity", f"/api/inventory/?limit={rows}", "identity"),
+            ("gzip", f"/api/inventory/?limit={rows}", "gzip"),
+            ("br", f"/api/inventory/?limit={rows}", "br"),
+            ("fields + gzip", f"/api/inventory/?limit={rows}&fields={FIELDS}", "gzip"),
+        ]:
+            if encoding == "br" and brotli is None:
+                continue
+            samples, wire = [], 0
+            for _ in range(5):
+                start = time.perf_counter()
+                with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+                    wire = sum(len(chunk) for chunk in response.iter_raw())
+                samples.append((time.perf_counter() - start) * 1000)
+            print(f"  {name + ':':14} {statistics.median(samples):6.0f} ms, {wire / 1024:5.0f} KB on the wire")
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    print(f"orjson: {'yes' if orjson else 'not installed'}, brotli: {'yes' if brotli else 'not installed'}")
+    serialization(args.rows)
+    end_to_end(args.rows)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark of the found-item scan path on a large database.
+
+Seeds a database with --items items (with inventory) spread over --categories
+OFF categories, then scans random known barcodes through the app, counting the
+SQL SELECTs each scan issues and reporting p50/p99 latency. Exits non-zero if
+a scan needs more than --max-queries queries.
+
+Usage:
+    cd backend && uv run python -m bench.scan_path [--items 50000] [--scans 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("ALMNTSHN_DATA_DIR", tempfile.mkdtemp(prefix="almntshn-bench-"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+
+import main  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from models import Item, Inventory  # noqa: E402
+from routers.inventory import _scan_known  # noqa: E402
+
+main.prepare()  # data directory, schema, search index and change-tracking triggers
+
+
+def seed(items: int, categories: int):
+    with SessionLocal() as db:
+        db.execute(insert(Item), [
+            {"barcode": str(10_000_000 + i), "name": f"Item {i}", "category": f"en:category-{i % categories}"}
+            for i in range(items)
+        ])
+        db.execute(insert(Inventory), [{"item_id": i + 1, "quantity": i % 4} for i in range(items)])
+        db.commit()
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def run(items: int, scans: int, max_queries: int) -> bool:
+    selects = []
+
+    def count_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects[-1] += 1
+
+    with TestClient(main.app) as client:
+        time.sleep(0.5)  # let startup jobs (history compaction) finish before counting
+        event.listen(engine, "before_cursor_execute", count_selects)
+        latencies = []
+        for _ in range(scans):
+            barcode = str(10_000_000 + random.randrange(items))
+            selects.append(0)
+            start = time.perf_counter()
+            response = client.post("/api/inventory/scan", json={"barcode": barcode})
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.json()["found_in_inventory"]
+        event.remove(engine, "before_cursor_execute", count_selects)
+
+        db_latencies = []
+        with SessionLocal() as db:
+            for _ in range(scans):
+                barcode = str(10_000_000 + random.randrange(items))
+                start = time.perf_counter()
+                _scan_known(db, barcode)
+                db_latencies.append((time.perf_counter() - start) * 1000)
+
+    print(f"{scans} scans of known items in a {items}-item database")
+    print(f"  queries per scan: max {max(selects)}, mean {statistics.mean(selects):.2f}")
+    print(f"  request latency:  p50 {percentile(latencies, 0.5):.2f} ms, p99 {percentile(latencies, 0.99):.2f} ms")
+    print(f"  database part:    p50 {percentile(db_latencies, 0.5):.2f} ms, p99 {percentile(db_latencies, 0.99):.2f} ms")
+    return max(selects) <= max_queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan hot path micro-benchmark.")
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--categories", type=int, default=2_000)
+    parser.add_argument("--scans", type=int, default=2_000)
+    parser.add_argument("--max-queries", type=int, default=1)
+    args = parser.parse_args()
+
+    seed(args.items, args.categories)
+    if not run(args.items, args.scans, args.max_queries):
+        print(f"FAIL: a scan issued more than {args.max_queries} queries")
+        sys.exit(1)
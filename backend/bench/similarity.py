@@ -0,0 +1,118 @@
+"""
+Latency of the similar-items engine on a large database.
+
+Seeds --items items with names, brands and OFF-style category tags drawn from
+small vocabularies (so words and categories are shared the way real products
+share them), then times the index's first load, ranking for known items and
+for new products, and catching up after a burst of writes. Exits non-zero if
+the p99 ranking time exceeds --budget-ms.
+
+Usage:
+    cd backend && uv run python -m bench.similarity [--items 100000] [--budget-ms 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("ALMNTSHN_DATA_DIR", tempfile.mkdtemp(prefix="almntshn-bench-"))
+
+from sqlalchemy import insert, update  # noqa: E402
+
+import main  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from models import Inventory, Item  # noqa: E402
+from services import similarity  # noqa: E402
+
+main.prepare()  # data directory, schema, search index and change-tracking triggers
+
+FOODS = ["milk", "rice", "pasta", "cheese", "yogurt", "bread", "coffee", "tea", "beans", "lentils", "oats",
+         "butter", "honey", "jam", "chocolate", "cereal", "soup", "sauce", "juice", "water", "flour", "sugar"]
+KINDS = ["organic", "whole", "light", "smoked", "plain", "classic", "spicy", "sweet", "salted", "fresh",
+         "instant", "wholegrain", "creamy", "dark", "green", "red", "mini", "family", "extra", "strong"]
+BRANDS = [f"Brand{n}" for n in range(400)]
+
+
+def seed(items: int):
+    rng = random.Random(0)
+    rows = []
+    for i in range(items):
+        food = rng.choice(FOODS)
+        rows.append({
+            "barcode": str(10_000_000 + i),
+            "name": f"{rng.choice(KINDS).title()} {rng.choice(KINDS)} {food} {rng.randrange(50, 1000)}g",
+            "brand": rng.choice(BRANDS),
+            "category": f"en:{rng.choice(KINDS)}-{food}",
+        })
+    with SessionLocal() as db:
+        db.execute(insert(Item), rows)
+        db.execute(insert(Inventory), [{"item_id": i + 1, "quantity": rng.choice([0, 1, 2, 3])} for i in range(items)])
+        db.commit()
+
+
+def percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def timed(fn, runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summary(samples: list[float]) -> str:
+    return f"p50 {statistics.median(samples):6.2f} ms, p99 {percentile(samples, 0.99):6.2f} ms"
+
+
+def run(items: int, queries: int, budget_ms: float) -> bool:
+    rng = random.Random(1)
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        similarity.sync(db)
+        print(f"  first load:           {(time.perf_counter() - start) * 1000:7.0f} ms "
+              f"({similarity.snapshot()['features']} features)")
+
+        known = timed(lambda: similarity.similar_to_item(str(10_000_000 + rng.randrange(items))), queries)
+        print(f"  rank for known item:  {summary(known)}")
+        new = timed(lambda: similarity.similar_to(
+            f"{rng.choice(KINDS)} {rng.choice(FOODS)}", rng.choice(BRANDS), f"en:{rng.choice(KINDS)}-{rng.choice(FOODS)}"
+        ), queries)
+        print(f"  rank for new product: {summary(new)}")
+        hits = similarity.similar_to_item("10000000")
+        print(f"  e.g. {len(hits)} results, scores {[score for _, score in hits]}")
+
+        changed = rng.sample(range(1, items + 1), 100)
+        db.execute(update(Item).where(Item.id.in_(changed[:50])).values(name=Item.name + " refill"))
+        db.execute(update(Inventory).where(Inventory.item_id.in_(changed[50:])).values(quantity=Inventory.quantity + 1))
+        db.commit()
+        start = time.perf_counter()
+        similarity.sync(db)
+        print(f"  sync after 100 writes: {(time.perf_counter() - start) * 1000:6.1f} ms")
+        after = timed(lambda: similarity.similar_to_item(str(10_000_000 + rng.randrange(items))), queries)
+        print(f"  rank after the writes: {summary(after)} (postings rebuilt on first use)")
+    return percentile(known + new, 0.99) <= budget_ms
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Similar-items engine benchmark.")
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--budget-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    if not similarity.available():
+        print("NumPy is not installed (uv sync --extra speedups); nothing to benchmark")
+        sys.exit(1)
+    seed(args.items)
+    print(f"{args.items} items, {args.queries} rankings each:")
+    if not run(args.items, args.queries, args.budget_ms):
+        print(f"FAIL: p99 ranking time is over {args.budget_ms} ms")
+        sys.exit(1)
@@ -0,0 +1,85 @@
+"""
+Compare mixed read/write throughput of the SQLite profiles in database.py.
+
+For each profile, seeds a fresh database, then runs reader threads (the
+inventory list query) and writer threads (scan logging, one commit per scan)
+side by side for a fixed time and reports operations per second.
+
+Usage:
+    cd backend && uv run python -m bench.sqlite_profile [--items 5000] [--seconds 5]
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker, joinedload
+
+from database import Base, SQLITE_PROFILES, create_sqlite_engine, sqlite_pragmas
+from models import Item, Inventory, ScanHistory
+
+
+def seed(Session, items: int):
+    with Session() as db:
+        db.add_all(Item(barcode=str(1000000 + i), name=f"Item {i}") for i in range(items))
+        db.flush()
+        db.add_all(Inventory(item_id=i + 1, quantity=i % 5) for i in range(items))
+        db.commit()
+
+
+def run_profile(profile: str, items: int, seconds: float, readers: int, writers: int) -> dict:
+    path = Path(tempfile.mkdtemp(prefix="almntshn-bench-")) / "inventory.db"
+    engine = create_sqlite_engine(f"sqlite:///{path}", sqlite_pragmas(profile))
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    seed(Session, items)
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    stop = time.perf_counter() + seconds
+
+    def reader():
+        with Session() as db:
+            while time.perf_counter() < stop:
+                db.query(Inventory).options(joinedload(Inventory.item)).limit(100).all()
+                db.rollback()  # end the read transaction, as a request would
+                counts["reads"] += 1
+
+    def writer():
+        with Session() as db:
+            while time.perf_counter() < stop:
+                try:
+                    db.add(ScanHistory(barcode="1000001", action="check"))
+                    db.commit()
+                    counts["writes"] += 1
+                except Exception:
+                    db.rollback()
+                    counts["errors"] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    return {name: count / seconds for name, count in counts.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite profile throughput benchmark.")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers + {args.writers} writers, {args.items} items, {args.seconds:g}s per profile")
+    for profile in SQLITE_PROFILES:
+        result = run_profile(profile, args.items, args.seconds, args.readers, args.writers)
+        print(
+            f"  {profile:12} reads {result['reads']:8.1f}/s  writes {result['writes']:8.1f}/s"
+            f"  errors {result['errors']:.1f}/s"
+        )
@@ -0,0 +1,75 @@
+"""
+A local stand-in for the Open Food Facts API, for benchmarks.
+
+Answers /api/v0/product/<barcode>.json after a configurable delay. Barcodes
+starting with "0" are "not found"; everything else is a product, with an image
+at /images/<barcode>.jpg (served if given in `images`). Counts the requests it
+serves.
+
+Usage (standalone):
+    cd backend && uv run python -m bench.stub_off --port 8099 --latency-ms 150
+    ALMNTSHN_OFF_BASE_URL=http://127.0.0.1:8099 make serve
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import uvicorn
+
+
+class StubOFF:
+    def __init__(self, latency_ms: float = 100, images: dict = None):
+        self.latency = latency_ms / 1000
+        self.images = images or {}  # barcode -> JPEG bytes
+        self.requests = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+
+        if scope["path"].startswith("/images/"):
+            image = self.images.get(scope["path"].rsplit("/", 1)[-1].removesuffix(".jpg"))
+            await send({"type": "http.response.start", "status": 200 if image else 404,
+                        "headers": [(b"content-type", b"image/jpeg" if image else b"text/plain")]})
+            await send({"type": "http.response.body", "body": image or b"not found"})
+            return
+
+        barcode = scope["path"].rsplit("/", 1)[-1].removesuffix(".json")
+        host, port = scope["server"]
+        if barcode.startswith("0"):
+            payload = {"status": 0, "code": barcode}
+        else:
+            payload = {"status": 1, "code": barcode, "product": {
+                "product_name": f"Product {barcode}",
+                "brands": "Stub",
+                "categories_tags": ["en:foods", f"en:group-{int(barcode) % 50}", f"en:sub-{barcode}"],
+                "quantity": "500 g",
+                "image_front_small_url": f"http://{host}:{port}/images/{barcode}.jpg",
+            }}
+        body = json.dumps(payload).encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+
+def start_in_thread(port: int = 8099, latency_ms: float = 100, images: dict = None) -> tuple[StubOFF, uvicorn.Server]:
+    """Run the stub in a background thread; returns once it accepts connections."""
+    app = StubOFF(latency_ms, images)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return app, server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Open Food Facts server.")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    args = parser.parse_args()
+    uvicorn.run(StubOFF(args.latency_ms), host="127.0.0.1", port=args.port)
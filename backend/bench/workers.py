@@ -0,0 +1,92 @@
+"""
+Throughput scaling and cold start of serve.py from 1 to N worker processes.
+
+Seeds a database like bench.load (--items items with inventory), then for each
+worker count starts `serve.py --workers <n>`, times how long until the
+workers are ready (every worker has logged that it started), and runs the
+load test's scenarios (--scenarios, default list and mixed; unknown barcodes
+are left out, so no Open Food Facts stub is needed) for --duration seconds
+with --concurrency clients. Prints requests/s and p50/p99 latency per worker
+count with the speed-up over one worker. Throughput can only scale with the
+CPUs there are to run the workers on (and the load generator, which shares
+them).
+
+Usage:
+    cd backend && uv run python -m bench.workers [--max-workers 4] [--duration 10] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+from bench.load import BASE, PORT, run_scenario, seed
+
+
+def start_serve(workers: int) -> tuple[subprocess.Popen, float]:
+    """Start serve.py; returns it and the seconds until all workers were ready."""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--port", str(PORT)],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+    )
+    ready = threading.Semaphore(0)
+
+    def follow():
+        for line in server.stdout:
+            if " ready: " in line:
+                ready.release()
+
+    threading.Thread(target=follow, daemon=True).start()
+    for _ in range(workers):
+        if not ready.acquire(timeout=60):
+            server.kill()
+            raise RuntimeError("workers did not start")
+    elapsed = time.perf_counter() - start
+    httpx.get(f"{BASE}/health").raise_for_status()
+    return server, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="serve.py throughput from 1 to N workers.")
+    parser.add_argument("--max-workers", type=int, default=max(2, os.cpu_count() or 1))
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--categories", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", default="list,mixed")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    args.unknown_ratio = 0  # scans of known barcodes only: no OFF lookups
+    scenarios = [s for s in args.scenarios.split(",") if s]
+
+    seed(args.items, args.categories)
+    counts = sorted({1, *(n for n in (2, 4, 8, 16) if n < args.max_workers), args.max_workers})
+    print(f"{args.items} items, {args.concurrency} clients, {args.duration:g} s per scenario, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'ready in':>9} {'scenario':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'speed-up':>9}")
+    baseline = {}
+    for workers in counts:
+        server, ready = start_serve(workers)
+        try:
+            for scenario in scenarios:
+                result = asyncio.run(run_scenario(scenario, args, args.seed))
+                if not result["requests"]:
+                    print(f"{workers:7} {ready * 1000:7.0f}ms {scenario:>9} {'-':>8} ({result['errors']} errors)")
+                    continue
+                baseline.setdefault(scenario, result["throughput_rps"])
+                print(f"{workers:7} {ready * 1000:7.0f}ms {scenario:>9} {result['throughput_rps']:8.1f} "
+                      f"{result['p50_ms']:8.2f} {result['p99_ms']:8.2f} "
+                      f"{result['throughput_rps'] / baseline[scenario]:8.2f}x")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Response compression: brotli when the client accepts it and the brotli package
+is installed, gzip otherwise, for responses of at least ALMNTSHN_COMPRESSION_MIN_SIZE
+bytes. Builds on Starlette's gzip responders, so streamed responses are
+compressed chunk by chunk and Server-Sent Events are left alone, as are images
+and other bodies that are compressed already.
+"""
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+
+# Compressing these again costs CPU and saves nothing
+COMPRESSED_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+def accepts(accept_encoding: str, coding: str) -> bool:
+    """Whether an Accept-Encoding header allows coding (ignoring preference order)."""
+    for entry in accept_encoding.split(","):
+        name, _, params = entry.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class SkipCompressed:
+    """Responder mixin: send bodies of COMPRESSED_TYPES as they are."""
+
+    async def send_with_compression(self, message):
+        await super().send_with_compression(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            self.content_type_is_excluded |= content_type.startswith(COMPRESSED_TYPES)
+
+
+class GzipResponder(SkipCompressed, GZipResponder):
+    pass
+
+
+class BrotliResponder(SkipCompressed, IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        # flush each chunk of a stream so the client isn't kept waiting for it
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("Accept-Encoding", "")
+        if brotli is not None and accepts(accept_encoding, "br"):
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif accepts(accept_encoding, "gzip"):
+            responder = GzipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
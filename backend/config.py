@@ -0,0 +1,87 @@
+"""Runtime settings, read from ALMNTSHN_* environment variables."""
+import os
+from pathlib import Path
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.environ.get(f"ALMNTSHN_{name}")
+    return int(value) if value else default
+
+
+def env_dict(name: str) -> dict:
+    """Parse "key=value,key=value" into a dict of strings."""
+    value = os.environ.get(f"ALMNTSHN_{name}", "")
+    return dict(pair.split("=", 1) for pair in value.split(",") if pair)
+
+
+# SQLite database and other local state
+DATA_DIR = Path(os.environ.get("ALMNTSHN_DATA_DIR") or Path(__file__).parent.parent / "data")
+FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
+# Hashed, precompressed copies of the frontend, rebuilt at startup (see assets.py)
+ASSETS_DIR = Path(os.environ.get("ALMNTSHN_ASSETS_DIR") or FRONTEND_DIR / "dist")
+SQLITE_PROFILE = os.environ.get("ALMNTSHN_SQLITE_PROFILE", "performance")  # or "default"
+SQLITE_PRAGMAS = env_dict("SQLITE_PRAGMAS")  # per-PRAGMA overrides, e.g. "cache_size=-64000"
+DB_POOL_SIZE = env_int("DB_POOL_SIZE", 8)
+DB_MAX_OVERFLOW = env_int("DB_MAX_OVERFLOW", 32)  # FastAPI's threadpool runs up to 40 requests
+
+# Worker processes (set by serve.py). With more than one, caches that only see
+# their own process's writes are turned off, and the change feed polls the database.
+WORKERS = env_int("WORKERS", 1)
+PREPARED = os.environ.get("ALMNTSHN_PREPARED") == "1"  # serve.py ran startup.prepare() already
+
+# Online backups of the database (see services/backups.py): a snapshot every
+# BACKUP_INTERVAL seconds (0 disables the schedule), the newest BACKUP_KEEP kept
+BACKUP_DIR = Path(os.environ.get("ALMNTSHN_BACKUP_DIR") or DATA_DIR / "backups")
+BACKUP_INTERVAL = env_int("BACKUP_INTERVAL", 24 * 3600)
+BACKUP_KEEP = env_int("BACKUP_KEEP", 7)
+BACKUP_STEP_PAGES = env_int("BACKUP_STEP_PAGES", 1024)  # pages copied per step (4 MiB at the default page size)
+BACKUP_STEP_PAUSE = float(os.environ.get("ALMNTSHN_BACKUP_STEP_PAUSE") or 0.01)  # seconds between steps
+
+# Open Food Facts lookup cache (all durations in seconds)
+OFF_CACHE_TTL = env_int("OFF_CACHE_TTL", 30 * 24 * 3600)  # found products stay fresh for 30 days
+OFF_NEGATIVE_CACHE_TTL = env_int("OFF_NEGATIVE_CACHE_TTL", 24 * 3600)  # "not found" answers for 1 day
+OFF_CACHE_STALE_TTL = env_int("OFF_CACHE_STALE_TTL", 180 * 24 * 3600)  # serve stale + refresh in background
+
+# Open Food Facts API
+OFF_BASE_URL = os.environ.get("ALMNTSHN_OFF_BASE_URL", "https://world.openfoodfacts.org")
+OFF_MAX_CONNECTIONS = env_int("OFF_MAX_CONNECTIONS", 10)
+
+# Scan history logging: "buffered" (write-behind, batched) or "sync" (committed with each request)
+SCAN_LOG_DURABILITY = os.environ.get("ALMNTSHN_SCAN_LOG_DURABILITY", "buffered")
+SCAN_LOG_FLUSH_SIZE = env_int("SCAN_LOG_FLUSH_SIZE", 100)  # rows
+SCAN_LOG_FLUSH_INTERVAL = float(os.environ.get("ALMNTSHN_SCAN_LOG_FLUSH_INTERVAL") or 2.0)  # seconds
+
+# Raw scan history older than this is compacted into daily rollups (0 keeps everything)
+SCAN_HISTORY_RETENTION_DAYS = env_int("SCAN_HISTORY_RETENTION_DAYS", 90)
+# How often new scans are folded into the rollups the analytics endpoints read
+ROLLUP_INTERVAL = env_int("ROLLUP_INTERVAL", 60)  # seconds
+
+# In-memory cache of scan results by barcode (0 entries disables it; off with several workers)
+ITEM_CACHE_SIZE = env_int("ITEM_CACHE_SIZE", 2000) if WORKERS == 1 else 0
+ITEM_CACHE_TTL = env_int("ITEM_CACHE_TTL", 300)  # seconds
+
+# How long Idempotency-Key answers of quantity changes are kept for retries
+IDEMPOTENCY_KEY_TTL = env_int("IDEMPOTENCY_KEY_TTL", 24 * 3600)  # seconds
+
+# Similar items returned with a scan, ranked by services/similarity.py (needs NumPy; 0 to disable)
+SIMILAR_ITEMS_LIMIT = env_int("SIMILAR_ITEMS_LIMIT", 10)
+
+# Local index of an Open Food Facts dump (built by scripts/import_off_dump.py).
+# Lookup mode: "local-first" (index, then cache/API), "offline" (never call the API) or "online" (ignore the index)
+OFF_INDEX_PATH = Path(os.environ.get("ALMNTSHN_OFF_INDEX_PATH") or DATA_DIR / "off_index.db")
+OFF_LOOKUP_MODE = os.environ.get("ALMNTSHN_OFF_LOOKUP_MODE", "local-first")
+
+# Product image proxy (see services/images.py): thumbnails of OFF images, fetched once and kept on disk
+IMAGE_CACHE_DIR = Path(os.environ.get("ALMNTSHN_IMAGE_CACHE_DIR") or DATA_DIR / "images")
+IMAGE_CACHE_MAX_MB = env_int("IMAGE_CACHE_MAX_MB", 200)  # 0 disables the proxy: clients load OFF URLs directly
+IMAGE_THUMBNAIL_SIZE = env_int("IMAGE_THUMBNAIL_SIZE", 200)  # pixels, longest side
+IMAGE_HOSTS = os.environ.get("ALMNTSHN_IMAGE_HOSTS", "images.openfoodfacts.org,static.openfoodfacts.org").split(",")
+IMAGE_MAX_CONNECTIONS = env_int("IMAGE_MAX_CONNECTIONS", 4)  # a pool of its own, so downloads don't hold up OFF lookups
+
+# Response compression (brotli if installed, else gzip) for bodies of at least this many bytes
+COMPRESSION_MIN_SIZE = env_int("COMPRESSION_MIN_SIZE", 1000)
+GZIP_LEVEL = env_int("GZIP_LEVEL", 6)
+BROTLI_QUALITY = env_int("BROTLI_QUALITY", 4)
+
+# Add a Server-Timing header (total and SQL time) to every response, for browser dev tools
+SERVER_TIMING = os.environ.get("ALMNTSHN_SERVER_TIMING", "") not in ("", "0", "false")
@@ -1,17 +1,77 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from pathlib import Path
 
-# Database file in the data directory
-DATA_DIR = Path(__file__).parent.parent / "data"
-DATA_DIR.mkdir(exist_ok=True)
-DATABASE_URL = f"sqlite:///{DATA_DIR}/inventory.db"
+from config import DATA_DIR, SQLITE_PROFILE, SQLITE_PRAGMAS, DB_POOL_SIZE, DB_MAX_OVERFLOW
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Database file in the data directory (created by startup.prepare())
+DATABASE_PATH = DATA_DIR / "inventory.db"
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+
+# PRAGMAs applied to every new connection, by profile. "performance" lets
+# readers (inventory list) proceed while a writer (scan logging) commits.
+SQLITE_PROFILES = {
+    "default": {},
+    "performance": {
+        "journal_mode": "WAL",  # readers don't block the writer and vice versa
+        "synchronous": "NORMAL",  # fsync at checkpoints, not every commit (safe with WAL)
+        "busy_timeout": 5000,  # ms to wait for the write lock before "database is locked"
+        "cache_size": -32000,  # page cache per connection, in KiB when negative
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def sqlite_pragmas(profile: str = SQLITE_PROFILE) -> dict:
+    """The profile's PRAGMAs with ALMNTSHN_SQLITE_PRAGMAS overrides applied."""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile {profile!r}; expected one of {list(SQLITE_PROFILES)}")
+    return {**SQLITE_PROFILES[profile], **SQLITE_PRAGMAS}
+
+
+def create_sqlite_engine(url: str, pragmas: dict) -> Engine:
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    return engine
+
+
+def describe_settings(engine: Engine) -> dict:
+    """Read back the PRAGMAs in effect on a pooled connection, for the startup log."""
+    with engine.connect() as conn:
+        settings = {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")
+        }
+    settings["pool_size"] = engine.pool.size()
+    settings["max_overflow"] = DB_MAX_OVERFLOW
+    return settings
+
+
+engine = create_sqlite_engine(DATABASE_URL, sqlite_pragmas())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def ensure_indexes(engine: Engine):
+    """create_all() only indexes tables it creates; add indexes declared since."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -1,35 +1,117 @@
-from fastapi import FastAPI
+import time
+
+IMPORT_STARTED = time.perf_counter()
+
+import os  # noqa: E402
+from contextlib import asynccontextmanager  # noqa: E402
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pathlib import Path
 
-from database import engine, Base
-from routers import items, inventory
+import assets
+import metrics
+from compression import CompressionMiddleware
+from config import (
+    SQLITE_PROFILE, COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY, FRONTEND_DIR, ASSETS_DIR, SERVER_TIMING,
+    PREPARED, WORKERS,
+)
+from database import engine, describe_settings
+from responses import FastJSONResponse
+from routers import items, inventory, stats, analytics, feed, thumbnails
+from services import backups, events, idempotency, images, item_cache, off_index, openfoodfacts, product_cache, scan_log, rollups, similarity
+from startup import prepare
+
+IMPORTED = time.perf_counter()
+cold_start = {}  # seconds, for /metrics
+
+# Request, SQL and cache metrics for /metrics
+metrics.instrument_engine(engine)
+metrics.register_gauges("almntshn_off_lookup_cache", "OFF lookup cache counters", product_cache.snapshot)
+metrics.register_gauges("almntshn_off_index", "Local OFF index counters", off_index.snapshot)
+metrics.register_gauges("almntshn_item_cache", "Scan result cache counters", item_cache.snapshot)
+metrics.register_gauges("almntshn_event_feed", "Change feed counters", events.snapshot)
+metrics.register_gauges("almntshn_similarity", "Similar-items engine", similarity.snapshot)
+metrics.register_gauges("almntshn_image_cache", "Product image cache counters", images.snapshot)
+metrics.register_gauges("almntshn_idempotency", "Idempotency keys claimed and replayed", idempotency.snapshot)
+metrics.register_gauges("almntshn_backups", "Database snapshots taken by this process", backups.snapshot)
+metrics.register_gauges("almntshn_cold_start", "Seconds to import the app and to run its startup", lambda: cold_start)
+metrics.register_gauges(
+    "almntshn_db_pool", "SQLAlchemy connection pool",
+    lambda: {"size": engine.pool.size(), "checked_out": engine.pool.checkedout(), "overflow": engine.pool.overflow()},
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    if not PREPARED:
+        prepare()
+    settings = ", ".join(f"{name}={value}" for name, value in describe_settings(engine).items())
+    print(f"SQLite '{SQLITE_PROFILE}' profile: {settings}")
+    # One pooled OFF client for the app's lifetime (keep-alive across lookups)
+    openfoodfacts.get_client()
+    scan_log.start()
+    rollups.start()
+    events.start()
+    similarity.start()
+    backups.start()
+    cold_start["import_seconds"] = IMPORTED - IMPORT_STARTED
+    cold_start["startup_seconds"] = time.perf_counter() - started
+    print(f"{f'Worker {os.getpid()}' if WORKERS > 1 else 'App'} ready: imported in "
+          f"{cold_start['import_seconds'] * 1000:.0f} ms, started in {cold_start['startup_seconds'] * 1000:.0f} ms")
+    yield
+    backups.stop()
+    events.stop()
+    await rollups.stop()
+    await scan_log.stop()
+    await openfoodfacts.close_client()
+    await images.close_client()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="almntshn",
     description="Home food inventory tracker",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    gzip_level=GZIP_LEVEL,
+    brotli_quality=BROTLI_QUALITY,
+)
+# Outermost, so compression counts towards request time
+app.add_middleware(metrics.MetricsMiddleware, server_timing=SERVER_TIMING)
 
 # Include routers
 app.include_router(items.router, prefix="/api")
 app.include_router(inventory.router, prefix="/api")
+app.include_router(stats.router, prefix="/api")
+app.include_router(analytics.router, prefix="/api")
+app.include_router(feed.router, prefix="/api")
+app.include_router(thumbnails.router, prefix="/api")
 
-# Serve frontend static files
-FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
+# Serve frontend static files: hashed names under /assets, cached for good.
+# The unhashed paths stay for pages loaded before an upgrade.
+asset_files = assets.AssetFiles(directory=ASSETS_DIR, check_dir=False)  # built by startup.prepare()
+app.mount("/assets", asset_files, name="assets")
 app.mount("/css", StaticFiles(directory=FRONTEND_DIR / "css"), name="css")
 app.mount("/js", StaticFiles(directory=FRONTEND_DIR / "js"), name="js")
 
 
 @app.get("/")
-async def root():
-    return FileResponse(FRONTEND_DIR / "index.html")
+async def root(request: Request):
+    return await asset_files.get_response("index.html", request.scope)
 
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Request, SQL, Open Food Facts and cache metrics in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,196 @@
+"""
+Request timing and counters, exposed in Prometheus text format on /metrics.
+
+MetricsMiddleware times every request by route template (/api/items/{item_id},
+not the literal path, to keep the number of series bounded). SQL statements are
+timed by engine events and, through a context variable that Starlette's
+threadpool copies into worker threads, also added up per request. With
+ALMNTSHN_SERVER_TIMING=1 each response carries a Server-Timing header with the
+request's total and database time, which browser dev tools show per request.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: dict[tuple, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.series: dict[tuple, list] = {}  # label values -> [per-bucket counts, sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = _labels(self.labels + ("le",), label_values + (_number(bound),))
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                le = _labels(self.labels + ("le",), label_values + ("+Inf",))
+                lines.append(f"{self.name}_bucket{le} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+http_duration = Histogram(
+    "almntshn_http_request_duration_seconds", "Time to handle a request", ("method", "route", "status")
+)
+http_queries = Histogram(
+    "almntshn_http_request_db_queries", "SQL statements run per request", ("route",), QUERY_COUNT_BUCKETS
+)
+http_db_seconds = Counter("almntshn_http_request_db_seconds_total", "Time spent in SQL by requests", ("route",))
+db_duration = Histogram("almntshn_db_query_duration_seconds", "SQL statement execution time", ("statement",))
+off_duration = Histogram("almntshn_off_request_duration_seconds", "Open Food Facts API request time")
+off_requests = Counter(
+    "almntshn_off_requests_total", "Open Food Facts API requests by outcome", ("outcome",)
+)  # found, not_found, error
+
+_registry = [http_duration, http_queries, http_db_seconds, db_duration, off_duration, off_requests]
+_gauges: list[tuple[str, str, Callable[[], dict]]] = []
+
+
+def register_gauges(name: str, help: str, read: Callable[[], dict]):
+    """Export the numeric values of read() (e.g. a cache snapshot) as name{key="..."}."""
+    _gauges.append((name, help, read))
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for name, help, read in _gauges:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+        for key, value in read().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f'{name}{{key="{key}"}} {_number(value)}')
+    return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine: Engine):
+    """Time every SQL statement run on engine and add it to the current request's stats."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_duration.observe(elapsed, statement.lstrip().split(None, 1)[0].upper())
+        stats = _request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+
+def route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:  # a mount, e.g. the static files
+        return scope.get("root_path") or "/"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request.set(stats)
+        start = time.perf_counter()
+        status, streaming = 500, False
+
+        async def send_with_timing(message: Message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                streaming = headers.get("content-type", "").startswith("text/event-stream")
+                if self.server_timing:
+                    total = (time.perf_counter() - start) * 1000
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", total;dur={total:.1f}',
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request.reset(token)
+            if not streaming:  # a feed connection's lifetime isn't a latency
+                route = route_name(scope)
+                http_duration.observe(time.perf_counter() - start, scope["method"], route, status)
+                http_queries.observe(stats.queries, route)
+                http_db_seconds.inc(route, amount=stats.db_seconds)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -10,13 +10,13 @@ class Item(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     barcode = Column(String, unique=True, index=True, nullable=False)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     brand = Column(String, nullable=True)
-    category = Column(String, nullable=True)  # mid-level OFF category tag for similarity matching
+    category = Column(String, nullable=True, index=True)  # mid-level OFF category tag for similarity matching
     image_url = Column(String, nullable=True)
     unit = Column(String, default="pcs")  # pcs, g, kg, ml, L
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
 
     inventory = relationship("Inventory", back_populates="item", uselist=False)
 
@@ -27,9 +27,9 @@ class Inventory(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     item_id = Column(Integer, ForeignKey("items.id"), unique=True, nullable=False)
-    quantity = Column(Float, default=0)
+    quantity = Column(Float, default=0, index=True)
     location = Column(String, nullable=True)  # pantry, fridge, freezer
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
 
     item = relationship("Item", back_populates="inventory")
 
@@ -43,3 +43,66 @@ class ScanHistory(Base):
     action = Column(String, nullable=False)  # add, remove, check
     quantity = Column(Float, default=1)
     timestamp = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_scan_history_barcode_timestamp", "barcode", "timestamp"),
+        Index("ix_scan_history_timestamp", "timestamp"),
+    )
+
+
+class ScanDailyRollup(Base):
+    """Scan counts and quantities per day, barcode and action, folded in from scan_history."""
+    __tablename__ = "scan_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    barcode = Column(String, primary_key=True)
+    action = Column(String, primary_key=True)  # add, remove, check
+    scans = Column(Integer, nullable=False, default=0)
+    quantity = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_scan_daily_rollups_barcode_day", "barcode", "day"),)
+
+
+class RollupState(Base):
+    """Single row: the last scan_history id already folded into the rollups."""
+    __tablename__ = "rollup_state"
+
+    id = Column(Integer, primary_key=True)
+    last_scan_id = Column(Integer, nullable=False, default=0)
+
+
+class ProductCache(Base):
+    """Cached Open Food Facts lookups by barcode, including "not found" answers."""
+    __tablename__ = "product_cache"
+
+    barcode = Column(String, primary_key=True)
+    found = Column(Boolean, nullable=False)
+    data = Column(Text, nullable=True)  # JSON of lookup_barcode's result when found
+    fetched_at = Column(DateTime, nullable=False)  # UTC
+
+
+class DataVersion(Base):
+    """Single row: a counter bumped by triggers on every items/inventory write."""
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class ItemChange(Base):
+    """The data version at which each item or its inventory last changed (kept after deletion, as a tombstone)."""
+    __tablename__ = "item_changes"
+
+    item_id = Column(Integer, primary_key=True)  # no foreign key: outlives the item
+    version = Column(Integer, nullable=False, index=True)
+
+
+class IdempotencyKey(Base):
+    """Responses to quantity changes by client-supplied Idempotency-Key, so a retried request isn't applied twice."""
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    endpoint = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)  # hash of the request body, to catch a key reused for another request
+    response = Column(Text, nullable=True)  # JSON, written in the same transaction as the change
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
@@ -0,0 +1,75 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered by one or more sort keys ending in a unique column, and the
+opaque cursor carries the last row's key values, so fetching the next page is
+an index range scan rather than an OFFSET that re-reads every skipped row.
+"""
+import base64
+import binascii
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import String, tuple_, type_coerce
+from sqlalchemy.orm import Query
+from sqlalchemy.types import DateTime
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: list) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        values = None
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _raw(expr):
+    """Key as stored. SQLite keeps datetimes as text, and CURRENT_TIMESTAMP text
+    ("... 12:00:00") doesn't compare equal to a bound datetime ("... 12:00:00.000000"),
+    so datetime keys are read and compared as plain strings."""
+    return type_coerce(expr, String) if isinstance(expr.type, DateTime) else expr
+
+
+def _after(keys: list, values: list, descending: bool):
+    """Rows sorting after `values`, as a row-value comparison (k1, k2) > (v1, v2),
+    which SQLite turns into an index range seek."""
+    left = tuple_(*(_raw(expr) for expr in keys))
+    right = tuple_(*values)
+    return left < right if descending else left > right
+
+
+def paginate(
+    query: Query,
+    keys: list,
+    limit: int,
+    cursor: Optional[str],
+    response: Response,
+    descending: bool = False,
+    skip: int = 0,
+) -> list:
+    """Return one page of `query` ordered by `keys`, a list of column expressions
+    whose last one is unique. Sets X-Next-Cursor when there are more rows, and
+    X-Total-Count on the first page. `skip` (OFFSET) is honoured only without a cursor.
+    """
+    if cursor is None:
+        response.headers["X-Total-Count"] = str(query.order_by(None).count())
+    else:
+        query = query.filter(_after(keys, decode_cursor(cursor, keys), descending))
+
+    query = query.order_by(*(expr.desc() if descending else expr for expr in keys))
+    query = query.add_columns(*(_raw(expr) for expr in keys))
+    if cursor is None and skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(list(rows[-1][1:]))
+    return [row[0] for row in rows]
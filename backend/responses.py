@@ -0,0 +1,101 @@
+"""
+JSON responses: orjson when it's installed, and `fields=` projection for list
+endpoints.
+
+A projected list skips the response model entirely: the requested attributes
+are read straight off the ORM rows and serialized, so asking for a few fields
+costs a fraction of validating and dumping every nested model.
+"""
+import typing
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, PlainSerializer
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+# Default response class of the app (see main.py)
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def _model_of(annotation) -> Optional[type[BaseModel]]:
+    """The pydantic model inside an annotation like Optional[ItemResponse], if any."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        model = _model_of(arg)
+        if model is not None:
+            return model
+    return None
+
+
+def parse_fields(fields: Optional[str], model: type[BaseModel]) -> Optional[dict]:
+    """Parse "id,quantity,item.name" into a projection checked against model:
+    {field: True (plain value) | serializer function | nested model class
+    (dumped whole) | {...}}.
+    None if no projection was asked for."""
+    if not fields:
+        return None
+    tree = {}
+    for path in filter(None, (p.strip() for p in fields.split(","))):
+        node, current = tree, model
+        parts = path.split(".")
+        for depth, part in enumerate(parts):
+            field = current.model_fields.get(part) if current else None
+            if field is None:
+                raise HTTPException(status_code=400, detail=f"Unknown field: {path}")
+            if depth == len(parts) - 1:
+                node[part] = True
+            elif node.get(part) is True:
+                break  # the whole parent was already asked for
+            else:
+                node = node.setdefault(part, {})
+            current = _model_of(field.annotation)
+    return _resolve(tree, model) or None
+
+
+def _resolve(tree: dict, model: type[BaseModel]) -> dict:
+    """Look nested models up once here rather than for every row in project()."""
+    spec = {}
+    for name, sub in tree.items():
+        field = model.model_fields[name]
+        nested = _model_of(field.annotation)
+        if nested is None:
+            serializer = next((m.func for m in field.metadata if isinstance(m, PlainSerializer)), None)
+            spec[name] = serializer or True
+        elif sub is True:
+            spec[name] = nested
+        else:
+            spec[name] = _resolve(sub, nested)
+    return spec
+
+
+def project(obj, spec: dict) -> dict:
+    """The fields in spec read from an ORM object, nested models as dicts."""
+    out = {}
+    for name, sub in spec.items():
+        value = getattr(obj, name)
+        if sub is True or value is None:
+            out[name] = value
+        elif isinstance(sub, dict):
+            out[name] = project(value, sub)
+        elif not isinstance(sub, type):
+            out[name] = sub(value)
+        else:
+            out[name] = sub.model_validate(value).model_dump(mode="json")
+    return out
+
+
+def projected_response(rows: list, spec: dict, response: Response) -> Response:
+    """A JSON list of projected rows, keeping headers already set on response
+    (FastAPI doesn't merge them into a Response returned by the endpoint)."""
+    content = [project(row, spec) for row in rows]
+    if orjson is None:
+        content = jsonable_encoder(content)  # datetimes
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return FastJSONResponse(content, headers=headers)
@@ -1 +1 @@
-from . import items, inventory
+from . import items, inventory, stats, analytics, feed, thumbnails
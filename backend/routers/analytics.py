@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+
+from database import get_db
+from models import Item, Inventory, ScanDailyRollup
+from schemas import TopItem, DailyActivity, Consumption
+from services.rollups import since
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get("/top-items", response_model=List[TopItem])
+def top_items(
+    days: int = Query(30, ge=1),
+    action: Optional[Literal["add", "remove", "check"]] = None,
+    limit: int = 10,
+    db: Session = Depends(get_db),
+):
+    """Most-scanned items over the last `days` days, optionally for one action."""
+    scans = func.sum(ScanDailyRollup.scans)
+    query = db.query(
+        ScanDailyRollup.barcode, Item.name, scans, func.sum(ScanDailyRollup.quantity)
+    ).outerjoin(Item, Item.barcode == ScanDailyRollup.barcode).filter(
+        ScanDailyRollup.day >= since(days)
+    )
+    if action:
+        query = query.filter(ScanDailyRollup.action == action)
+    rows = query.group_by(ScanDailyRollup.barcode).order_by(scans.desc()).limit(limit).all()
+    return [
+        TopItem(barcode=barcode, name=name, scans=count, quantity=quantity)
+        for barcode, name, count, quantity in rows
+    ]
+
+
+@router.get("/activity", response_model=List[DailyActivity])
+def activity(days: int = Query(30, ge=1), db: Session = Depends(get_db)):
+    """Adds, removes and checks per day over the last `days` days (days without scans are omitted)."""
+    rows = db.query(
+        ScanDailyRollup.day,
+        ScanDailyRollup.action,
+        func.sum(ScanDailyRollup.scans),
+        func.sum(ScanDailyRollup.quantity),
+    ).filter(ScanDailyRollup.day >= since(days)).group_by(
+        ScanDailyRollup.day, ScanDailyRollup.action
+    ).order_by(ScanDailyRollup.day).all()
+
+    by_day = {}
+    for day, action, count, quantity in rows:
+        entry = by_day.setdefault(day, DailyActivity(day=day))
+        if action == "add":
+            entry.adds, entry.added_quantity = count, quantity
+        elif action == "remove":
+            entry.removes, entry.removed_quantity = count, quantity
+        else:
+            entry.checks = count
+    return list(by_day.values())
+
+
+@router.get("/consumption", response_model=List[Consumption])
+def consumption(days: int = Query(30, ge=1), limit: int = 20, db: Session = Depends(get_db)):
+    """How fast items are used up: quantity removed per day over the last `days`
+    days, with how long the current stock lasts at that rate. Fastest first."""
+    removed = func.sum(ScanDailyRollup.quantity)
+    rows = db.query(ScanDailyRollup.barcode, Item.name, removed, Inventory.quantity).outerjoin(
+        Item, Item.barcode == ScanDailyRollup.barcode
+    ).outerjoin(Inventory, Inventory.item_id == Item.id).filter(
+        ScanDailyRollup.day >= since(days), ScanDailyRollup.action == "remove"
+    ).group_by(ScanDailyRollup.barcode).order_by(removed.desc()).limit(limit).all()
+
+    results = []
+    for barcode, name, quantity_removed, quantity_left in rows:
+        per_day = quantity_removed / days
+        quantity_left = quantity_left or 0
+        results.append(Consumption(
+            barcode=barcode,
+            name=name,
+            removed_quantity=quantity_removed,
+            per_day=round(per_day, 3),
+            quantity_left=quantity_left,
+            days_left=round(quantity_left / per_day, 1) if per_day else None,
+        ))
+    return results
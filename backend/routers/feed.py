@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from services import events
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+async def _stream():
+    queue = events.subscribe()
+    try:
+        yield "retry: 3000\n\n"  # EventSource reconnects after 3s if the stream drops
+        while (message := await queue.get()) is not events.CLOSE:  # the server is shutting down
+            yield events.drain(queue, message)
+    finally:
+        events.unsubscribe(queue)
+
+
+@router.get("/")
+async def event_stream():
+    """
+    Server-Sent Events stream of inventory and item changes.
+    `change` events carry the ids of changed items: fetch them with
+    /inventory/changes. `resync` means events were missed (or a bulk import
+    happened): reload the list.
+    """
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
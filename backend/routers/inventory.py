@@ -1,20 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+import asyncio
+import codecs
+import tempfile
 
-from database import get_db
-from models import Item, Inventory, ScanHistory
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, bindparam, func, or_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, aliased, joinedload
+from typing import List, Literal, Optional
+
+from database import engine, get_db
+from models import DataVersion, Item, Inventory
+from pagination import paginate
+from responses import parse_fields, projected_response
 from schemas import (
     InventoryResponse, InventoryUpdate, 
-    ScanRequest, ScanResult, SimilarItem, AdjustQuantityRequest, QuickAddRequest
+    ScanRequest, ScanResult, SimilarItem, AdjustQuantityRequest, QuickAddRequest,
+    BatchRequest, BatchResult, BatchOperationResult, ImportResult, InventoryChanges,
 )
+from services import changes, events, idempotency, item_cache, scan_log, similarity, transfer
 from services.openfoodfacts import lookup_barcode
+from services.search import ranked_matches
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
+# Aliases for the self-join in _scan_known, built once so the query's compiled form is cached
+Similar = aliased(Item)
+SimilarInventory = aliased(Inventory)
+VERSION_QUERY = select(DataVersion.version).where(DataVersion.id == 1)
+VERSION = VERSION_QUERY.scalar_subquery()
+
+# quantity = max(0, quantity + delta), creating the inventory row if there is none.
+# A single statement, so concurrent changes to one item can't overwrite each
+# other; run with many parameter sets, a batch's changes apply in order, each clamped.
+INCREMENT = insert(Inventory).values(
+    item_id=bindparam("item_id"), quantity=func.max(0, bindparam("delta"))
+).on_conflict_do_update(
+    index_elements=[Inventory.item_id],
+    set_={
+        "quantity": func.max(0, func.coalesce(Inventory.quantity, 0) + bindparam("delta")),
+        "updated_at": func.now(),  # the column's onupdate doesn't apply to an upsert
+    },
+)
+
 
-def find_similar_items(db: Session, category: str, exclude_item_id: int = None) -> list:
-    """Find inventory items with the same OFF category."""
+def find_similar_items(db: Session, product: dict, exclude_item_id: int = None) -> list:
+    """Find inventory items like an OFF product: ranked by the similarity engine
+    if NumPy is installed, else those with the same OFF category."""
+    if similarity.available():
+        similarity.sync(db)
+        ranked = similarity.similar_to(product.get("name"), product.get("brand"), product.get("category"))
+        return _similar_items(db, [(item_id, score) for item_id, score in ranked if item_id != exclude_item_id])
+
+    category = product.get("category")
     if not category:
         return []
 
@@ -30,59 +69,250 @@ def find_similar_items(db: Session, category: str, exclude_item_id: int = None)
     ]
 
 
+def _similar_items(db: Session, ranked: list) -> list:
+    """SimilarItems for (item id, score) pairs, in that order."""
+    if not ranked:
+        return []
+    scores = dict(ranked)
+    rows = db.query(Inventory).options(joinedload(Inventory.item)).filter(Inventory.item_id.in_(scores)).all()
+    rows.sort(key=lambda inv: -scores[inv.item_id])
+    return [SimilarItem(item=inv.item, quantity=inv.quantity, score=scores[inv.item_id]) for inv in rows]
+
+
 @router.get("/", response_model=List[InventoryResponse])
 def list_inventory(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     search: str = None,
     in_stock_only: bool = False,
+    sort: Optional[Literal["id", "name", "updated_at", "quantity"]] = None,
+    desc: bool = False,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """List all inventory items."""
+    """
+    List all inventory items. `search` matches word prefixes in name, brand
+    and category, best matches first unless `sort` is given.
+    Pages are cursor-based: pass the X-Next-Cursor header of a response as
+    `cursor` to get the next page. The first page also has X-Total-Count.
+    The ETag follows the data version, so an unchanged list costs a 304;
+    X-Inventory-Version is the `since` to pass to /changes.
+    `fields` (e.g. "item_id,quantity,item.name") returns only those fields.
+    """
+    spec = parse_fields(fields, InventoryResponse)
+    
+    # The version and the page are read in one transaction, so the version matches the rows
+    changes.begin_read(db)
+    version = changes.current_version(db)
+    headers = {"ETag": changes.etag(version), "Cache-Control": "no-cache", "X-Inventory-Version": str(version)}
+    if if_none_match and changes.etag_matches(if_none_match, version):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    
     query = db.query(Inventory).options(joinedload(Inventory.item))
     
+    sort_key, tiebreak = None, Inventory.id
     if search:
-        query = query.join(Item).filter(Item.name.ilike(f"%{search}%"))
+        matches = ranked_matches(search)
+        if matches is None:
+            response.headers["X-Total-Count"] = "0"
+            return []
+        query = query.join(matches, matches.c.item_id == Inventory.item_id)
+        if sort is None:
+            sort_key = matches.c.rank
     
     if in_stock_only:
         query = query.filter(Inventory.quantity > 0)
     
-    return query.offset(skip).limit(limit).all()
+    if sort == "name":
+        query = query.join(Item)
+        sort_key, tiebreak = Item.name, Item.id  # ix_items_name already orders by (name, id)
+    elif sort == "updated_at":
+        sort_key = Inventory.updated_at
+    elif sort == "quantity":
+        sort_key = Inventory.quantity
+    keys = [tiebreak] if sort_key is None else [sort_key, tiebreak]
+    
+    rows = paginate(query, keys, limit, cursor, response, descending=desc, skip=skip)
+    if spec:
+        return projected_response(rows, spec, response)
+    return rows
 
 
-@router.post("/scan", response_model=ScanResult)
-async def scan_barcode(request: ScanRequest, db: Session = Depends(get_db)):
+@router.get("/changes", response_model=InventoryChanges)
+def inventory_changes(since: int, db: Session = Depends(get_db)):
     """
-    Scan a barcode to check if we have it.
-    Returns item info and current quantity if in inventory.
-    If not known, looks up in Open Food Facts.
-    Also returns similar items already in inventory (by shared OFF categories).
+    Inventory rows changed after data version `since` (from X-Inventory-Version
+    or a previous call), and the ids of items removed from inventory since.
+    410 if `since` is ahead of the database (e.g. it was reset): reload the list.
+    """
+    changes.begin_read(db)
+    version = changes.current_version(db)
+    if since > version:
+        raise HTTPException(status_code=410, detail="Unknown version, reload the inventory")
+    changed, deleted = changes.changes_since(db, since) if since < version else ([], [])
+    return InventoryChanges(version=version, changed=changed, deleted=deleted)
+
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+SPOOL_SIZE = 1024 * 1024  # import bodies larger than this are spooled to disk
+
+
+@router.get("/export")
+def export_inventory(format: Literal["ndjson", "csv"] = "ndjson"):
+    """
+    Stream every item with its quantity and location as NDJSON or CSV.
+    Rows are read and sent in batches from one snapshot of the database,
+    so memory use doesn't grow with the inventory.
+    """
+    return StreamingResponse(
+        transfer.export_stream(engine, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="inventory.{format}"'},
+    )
+
+
+def _import_file(body, fmt: str) -> dict:
+    body.seek(0)
+    with body:
+        text = codecs.getreader("utf-8-sig")(body)
+        summary = transfer.import_records(engine, transfer.read_records(text, fmt))
+    item_cache.clear()
+    if summary["created"] or summary["updated"]:
+        events.publish("resync")
+    return summary
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_inventory(request: Request, format: Optional[Literal["ndjson", "csv"]] = None):
+    """
+    Upsert items and inventory by barcode from an NDJSON or CSV request body
+    (as produced by /export). The format defaults from the Content-Type.
+    Records are written in chunked transactions; invalid lines are skipped and
+    reported, and fields missing from a record keep their current value.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    async for chunk in request.stream():
+        body.write(chunk)
+    return await run_in_threadpool(_import_file, body, format)
+
+
+def _scan_known(db: Session, barcode: str) -> Optional[ScanResult]:
+    """Log the scan and answer it from our own tables; None if the barcode is new.
+
+    One query fetches the item, its quantity and its similar items: the item row
+    is repeated once per similar item (or once with NULLs if there are none).
+    With the similarity engine, the similar items are ranked first and fetched
+    by id alongside the item instead (see _scan_ranked).
+    Results for known items are kept in item_cache until a write touches them.
     """
     # Log the scan
-    scan_log = ScanHistory(barcode=request.barcode, action="check")
-    db.add(scan_log)
+    scan_log.record(db, barcode, "check")
     db.commit()
     
-    # Check if we have this item
-    item = db.query(Item).filter(Item.barcode == request.barcode).first()
+    cached = item_cache.get(barcode)
+    if cached:
+        return cached
+    generation = item_cache.generation()
     
-    if item:
-        inventory = db.query(Inventory).filter(Inventory.item_id == item.id).first()
-        similar = find_similar_items(db, item.category, exclude_item_id=item.id)
-        return ScanResult(
+    if similarity.available():
+        result = _scan_ranked(db, barcode)
+        if result is None:
+            return None
+        item = result.item
+    else:
+        rows = db.query(Item, Inventory.quantity, Similar, SimilarInventory.quantity).outerjoin(
+            Inventory, Inventory.item_id == Item.id
+        ).outerjoin(
+            Similar, and_(Similar.category == Item.category, Similar.id != Item.id)
+        ).outerjoin(
+            SimilarInventory, SimilarInventory.item_id == Similar.id
+        ).filter(Item.barcode == barcode).order_by(Similar.id).all()
+        
+        if not rows:
+            return None
+        
+        item, quantity = rows[0][0], rows[0][1]
+        result = ScanResult(
             found_in_inventory=True,
             item=item,
-            quantity=inventory.quantity if inventory else 0,
-            similar_items=similar,
+            quantity=quantity or 0,
+            # only items that have an inventory record, as in find_similar_items
+            similar_items=[
+                SimilarItem(item=similar, quantity=similar_quantity)
+                for _, _, similar, similar_quantity in rows
+                if similar is not None and similar_quantity is not None
+            ],
         )
+    related = tuple(similar.item.barcode for similar in result.similar_items)
+    item_cache.put(barcode, result, item.category, generation, related)
+    return result
+
+
+def _scan_ranked(db: Session, barcode: str) -> Optional[ScanResult]:
+    """_scan_known with similar items ranked by the similarity engine.
+
+    The ranking comes from the in-memory index, so one query fetches the item
+    and the ranked items by id, plus the data version: if that is newer than
+    the index, the index catches up and the query runs once more.
+    """
+    for _ in range(2):
+        ranked = similarity.similar_to_item(barcode)
+        scores = dict(ranked or ())
+        rows = db.query(Item, Inventory.quantity, VERSION).outerjoin(
+            Inventory, Inventory.item_id == Item.id
+        ).filter(or_(Item.barcode == barcode, Item.id.in_(scores))).all()
+        version = rows[0][2] if rows else db.scalar(VERSION_QUERY)
+        if version == similarity.version() and (ranked is not None or not rows):
+            break
+        similarity.sync(db, version)
+
+    found = [row for row in rows if row[0].barcode == barcode]
+    if not found:
+        return None
+    item, quantity, _ = found[0]
+    similar = sorted(
+        (row for row in rows if row[0].id in scores and row[1] is not None), key=lambda row: -scores[row[0].id]
+    )
+    return ScanResult(
+        found_in_inventory=True,
+        item=item,
+        quantity=quantity or 0,
+        similar_items=[
+            SimilarItem(item=other, quantity=other_quantity, score=scores[other.id])
+            for other, other_quantity, _ in similar
+        ],
+    )
+
+
+@router.post("/scan", response_model=ScanResult)
+async def scan_barcode(request: ScanRequest, db: Session = Depends(get_db)):
+    """
+    Scan a barcode to check if we have it.
+    Returns item info and current quantity if in inventory.
+    If not known, looks up in Open Food Facts.
+    Also returns similar items already in inventory (by shared OFF categories).
+
+    Database work runs in the threadpool so a slow SQLite write doesn't stall
+    the event loop (and every other request) while the OFF lookup is awaited here.
+    """
+    result = await run_in_threadpool(_scan_known, db, request.barcode)
+    if result:
+        return result
     
     # Not in our database - look up in Open Food Facts
     product_info = await lookup_barcode(request.barcode)
     
     # Even for unknown items, check if we have something similar
     similar = []
-    if product_info and product_info.get("category"):
-        similar = find_similar_items(db, product_info["category"])
+    if product_info and (product_info.get("category") or similarity.available()):
+        similar = await run_in_threadpool(find_similar_items, db, product_info)
     
     return ScanResult(
         found_in_inventory=False,
@@ -91,79 +321,227 @@ async def scan_barcode(request: ScanRequest, db: Session = Depends(get_db)):
     )
 
 
+def _came_into_stock(quantity: float, added: float) -> bool:
+    """Whether adding `added` (> 0) brought an item's quantity up from zero. Items
+    leaving stock need no such care: entries listing them are dropped by barcode."""
+    return added > 0 and 0 < quantity <= added
+
+
+def _get_item(db: Session, barcode: str) -> Optional[Item]:
+    return db.query(Item).filter(Item.barcode == barcode).first()
+
+
+def _new_item(barcode: str, item_data: dict) -> dict:
+    """Column values for an item from a provided name or an Open Food Facts lookup result."""
+    return {
+        "barcode": barcode,
+        "name": item_data.get("name", f"Unknown ({barcode})"),
+        "brand": item_data.get("brand"),
+        "category": item_data.get("category"),
+        "image_url": item_data.get("image_url"),
+    }
+
+
+def _create_items(db: Session, new_items: dict) -> tuple[dict, set]:
+    """Insert items by barcode from item data, skipping any that exist by now
+    (another phone may have just added the same product). Returns the ids of
+    all of them and the barcodes of those actually inserted here."""
+    if not new_items:
+        return {}, set()
+    ids = dict(db.execute(
+        insert(Item).on_conflict_do_nothing(index_elements=[Item.barcode]).returning(Item.barcode, Item.id),
+        [_new_item(barcode, item_data) for barcode, item_data in new_items.items()],
+    ).all())
+    created = set(ids)
+    if len(ids) < len(new_items):
+        ids.update(db.execute(
+            select(Item.barcode, Item.id).where(Item.barcode.in_(new_items.keys() - created))
+        ).all())
+    return ids, created
+
+
+def _load_inventories(db: Session, item_ids: list) -> dict:
+    """Inventory rows (with their items) by item id, as they are now in the database."""
+    rows = db.query(Inventory).options(joinedload(Inventory.item)).filter(
+        Inventory.item_id.in_(item_ids)
+    ).execution_options(populate_existing=True)  # the session may hold them from before the change
+    return {inv.item_id: inv for inv in rows}
+
+
+async def _item_data(barcode: str, name: Optional[str]) -> dict:
+    """Data for a new item: the provided name, else an OFF lookup."""
+    if name:
+        return {"name": name}
+    return await lookup_barcode(barcode) or {"name": f"Unknown ({barcode})"}
+
+
+def _add_one(db: Session, request: QuickAddRequest, item: Optional[Item], item_data: Optional[dict],
+             idempotency_key: Optional[str]) -> InventoryResponse:
+    """Create the item from item_data if needed, then add 1 to its inventory."""
+    replay = idempotency.claim(db, idempotency_key, "quick-add", request)
+    if replay:
+        return replay
+    
+    barcode = request.barcode
+    item_id = item.id if item else _create_items(db, {barcode: item_data})[0][barcode]
+    db.execute(INCREMENT, {"item_id": item_id, "delta": 1})
+    
+    # Log the action
+    scan_log.record(db, barcode, "add", 1)
+    
+    # Serialize here, while still off the event loop (item is lazy-loaded)
+    result = InventoryResponse.model_validate(_load_inventories(db, [item_id])[item_id])
+    idempotency.store(db, idempotency_key, result)
+    db.commit()
+    item_cache.invalidate(barcode, result.item.category)
+    if item is None or _came_into_stock(result.quantity, 1):
+        item_cache.invalidate_similar()
+    events.publish_change([item_id])
+    return result
+
+
 @router.post("/quick-add", response_model=InventoryResponse)
-async def quick_add(request: QuickAddRequest, db: Session = Depends(get_db)):
+async def quick_add(
+    request: QuickAddRequest,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
     Quick add: scan a barcode and add 1 to inventory.
     Creates the item if it doesn't exist (looks up in Open Food Facts).
+    Database work runs in the threadpool, as in scan_barcode.
+    The add is atomic, as in adjust_quantity, and a request retried with the
+    same Idempotency-Key header gets the first answer instead of adding again.
     """
     # Check if item exists
-    item = db.query(Item).filter(Item.barcode == request.barcode).first()
+    item = await run_in_threadpool(_get_item, db, request.barcode)
     
-    if not item:
-        # Look up or use provided name
-        if request.name:
-            item_data = {"name": request.name}
-        else:
-            item_data = await lookup_barcode(request.barcode)
-            if not item_data:
-                item_data = {"name": f"Unknown ({request.barcode})"}
-        
-        item = Item(
-            barcode=request.barcode,
-            name=item_data.get("name", f"Unknown ({request.barcode})"),
-            brand=item_data.get("brand"),
-            category=item_data.get("category"),
-            image_url=item_data.get("image_url")
-        )
-        db.add(item)
-        db.commit()
-        db.refresh(item)
+    # Look up or use provided name
+    item_data = None if item else await _item_data(request.barcode, request.name)
     
-    # Get or create inventory record
-    inventory = db.query(Inventory).filter(Inventory.item_id == item.id).first()
-    if not inventory:
-        inventory = Inventory(item_id=item.id, quantity=0)
-        db.add(inventory)
+    return await run_in_threadpool(_add_one, db, request, item, item_data, idempotency_key)
+
+
+def _items_by_barcode(db: Session, barcodes: set) -> dict:
+    """Known items (with their inventory) for a set of barcodes, in one query."""
+    items = db.query(Item).options(joinedload(Item.inventory)).filter(Item.barcode.in_(barcodes)).all()
+    return {item.barcode: item for item in items}
+
+
+def _apply_batch(db: Session, request: BatchRequest, items: dict, new_item_data: dict,
+                 idempotency_key: Optional[str]) -> BatchResult:
+    """Apply all operations in one transaction, creating items from new_item_data."""
+    replay = idempotency.claim(db, idempotency_key, "batch", request)
+    if replay:
+        return replay
     
-    # Add 1
-    inventory.quantity += 1
+    ids = {barcode: item.id for barcode, item in items.items()}
+    created_ids, created = _create_items(db, new_item_data)
+    ids.update(created_ids)
     
-    # Log the action
-    scan_log = ScanHistory(barcode=request.barcode, action="add", quantity=1)
-    db.add(scan_log)
+    results, increments = [], []
+    for op in request.operations:
+        if op.barcode not in ids:
+            results.append(BatchOperationResult(
+                barcode=op.barcode, ok=False, error="Item not found. Scan it first to add."
+            ))
+            continue
+        increments.append({"item_id": ids[op.barcode], "delta": op.delta})
+        action = "add" if op.delta > 0 else "remove"
+        scan_log.record(db, op.barcode, action, abs(op.delta))
+        results.append(BatchOperationResult(barcode=op.barcode, ok=True, created=op.barcode in created))
+        created.discard(op.barcode)  # reported by the first operation on a new barcode
+    if increments:
+        db.execute(INCREMENT, increments)
     
+    # Reload everything touched in one query rather than refreshing row by row
+    touched = list({change["item_id"] for change in increments})
+    inventories = {
+        item_id: InventoryResponse.model_validate(inv) for item_id, inv in _load_inventories(db, touched).items()
+    }
+    for result in results:
+        if result.ok:
+            result.inventory = inventories[ids[result.barcode]]
+    batch = BatchResult(results=results)
+    idempotency.store(db, idempotency_key, batch)
     db.commit()
-    db.refresh(inventory)
     
-    return inventory
+    for barcode in {result.barcode for result in results if result.ok}:
+        item_cache.invalidate(barcode)
+    item_cache.invalidate(None, *{inventory.item.category for inventory in inventories.values()})
+    added = {}
+    for change in increments:
+        added[change["item_id"]] = added.get(change["item_id"], 0) + max(change["delta"], 0)
+    if new_item_data or any(_came_into_stock(inventories[i].quantity, n) for i, n in added.items()):
+        item_cache.invalidate_similar()
+    events.publish_change(touched)
+    return batch
+
+
+@router.post("/batch", response_model=BatchResult)
+async def batch_adjust(
+    request: BatchRequest,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Apply many quantity changes at once, e.g. when unpacking shopping.
+    Known items are resolved with one query, unknown barcodes with a positive
+    delta are looked up in Open Food Facts concurrently and created, and every
+    change is committed in a single transaction. Returns one result per
+    operation, in order, each with the item's inventory after the whole batch;
+    removing an unknown item is reported as an error. Changes are atomic
+    and Idempotency-Key is honoured, as in quick_add.
+    """
+    barcodes = {op.barcode for op in request.operations}
+    items = await run_in_threadpool(_items_by_barcode, db, barcodes)
+    
+    # An unknown barcode is created if any operation adds to it, named by the first that does
+    to_create = {}
+    for op in request.operations:
+        if op.barcode not in items and op.barcode not in to_create and op.delta > 0:
+            to_create[op.barcode] = op.name
+    lookups = await asyncio.gather(*(_item_data(b, name) for b, name in to_create.items()))
+    new_item_data = dict(zip(to_create, lookups))
+    
+    return await run_in_threadpool(_apply_batch, db, request, items, new_item_data, idempotency_key)
 
 
 @router.post("/adjust", response_model=InventoryResponse)
-def adjust_quantity(request: AdjustQuantityRequest, db: Session = Depends(get_db)):
+def adjust_quantity(
+    request: AdjustQuantityRequest,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
     Adjust quantity for an item (positive to add, negative to remove).
+    Applied as one atomic SQL update clamped at zero, so concurrent adjustments
+    from several phones all count. Send an Idempotency-Key header (any unique
+    string per change) to make retries safe: a repeated key returns the first
+    answer without adjusting again.
     """
     item = db.query(Item).filter(Item.barcode == request.barcode).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found. Scan it first to add.")
+    item_id = item.id
     
-    inventory = db.query(Inventory).filter(Inventory.item_id == item.id).first()
-    if not inventory:
-        inventory = Inventory(item_id=item.id, quantity=0)
-        db.add(inventory)
-    
-    inventory.quantity = max(0, inventory.quantity + request.delta)
+    replay = idempotency.claim(db, idempotency_key, "adjust", request)
+    if replay:
+        return replay
+    db.execute(INCREMENT, {"item_id": item_id, "delta": request.delta})
     
     # Log the action
     action = "add" if request.delta > 0 else "remove"
-    scan_log = ScanHistory(barcode=request.barcode, action=action, quantity=abs(request.delta))
-    db.add(scan_log)
+    scan_log.record(db, request.barcode, action, abs(request.delta))
     
+    result = InventoryResponse.model_validate(_load_inventories(db, [item_id])[item_id])
+    idempotency.store(db, idempotency_key, result)
     db.commit()
-    db.refresh(inventory)
-    
-    return inventory
+    item_cache.invalidate(request.barcode, result.item.category)
+    if _came_into_stock(result.quantity, request.delta):
+        item_cache.invalidate_similar()
+    events.publish_change([item_id])
+    return result
 
 
 @router.put("/{item_id}", response_model=InventoryResponse)
@@ -173,11 +551,16 @@ def update_inventory(item_id: int, update: InventoryUpdate, db: Session = Depend
     if not inventory:
         raise HTTPException(status_code=404, detail="Inventory record not found")
     
+    was_in_stock = (inventory.quantity or 0) > 0
     for key, value in update.model_dump(exclude_unset=True).items():
         setattr(inventory, key, value)
     
     db.commit()
     db.refresh(inventory)
+    item_cache.invalidate(inventory.item.barcode, inventory.item.category)
+    if not was_in_stock and (inventory.quantity or 0) > 0:
+        item_cache.invalidate_similar()
+    events.publish_change([item_id])
     return inventory
 
 
@@ -191,6 +574,9 @@ def remove_from_inventory(barcode: str, db: Session = Depends(get_db)):
     inventory = db.query(Inventory).filter(Inventory.item_id == item.id).first()
     if inventory:
         inventory.quantity = 0
+        category, item_id = item.category, item.id
         db.commit()
+        item_cache.invalidate(barcode, category)
+        events.publish_change([item_id])
     
     return {"ok": True}
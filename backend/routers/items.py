@@ -1,26 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional
 
 from database import get_db
 from models import Item, Inventory
+from pagination import paginate
+from responses import parse_fields, projected_response
 from schemas import ItemCreate, ItemUpdate, ItemResponse
+from services import events, item_cache
+from services.search import ranked_matches
 
 router = APIRouter(prefix="/items", tags=["items"])
 
 
 @router.get("/", response_model=List[ItemResponse])
-def list_items(skip: int = 0, limit: int = 100, search: str = None, db: Session = Depends(get_db)):
-    """List all known items, optionally filtered by search term."""
+def list_items(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    search: str = None,
+    sort: Optional[Literal["id", "name", "updated_at"]] = None,
+    desc: bool = False,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """List all known items, optionally filtered by search term (word prefixes
+    in name, brand and category, best matches first unless `sort` is given).
+    Cursor-paginated like GET /inventory/, and `fields` selects fields as there."""
+    spec = parse_fields(fields, ItemResponse)
     query = db.query(Item)
+    sort_key = None
     if search:
-        query = query.filter(Item.name.ilike(f"%{search}%"))
-    return query.offset(skip).limit(limit).all()
+        matches = ranked_matches(search)
+        if matches is None:
+            response.headers["X-Total-Count"] = "0"
+            return []
+        query = query.join(matches, matches.c.item_id == Item.id)
+        if sort is None:
+            sort_key = matches.c.rank
+    if sort == "name":
+        sort_key = Item.name
+    elif sort == "updated_at":
+        sort_key = Item.updated_at
+    keys = [Item.id] if sort_key is None else [sort_key, Item.id]
+    rows = paginate(query, keys, limit, cursor, response, descending=desc, skip=skip)
+    if spec:
+        return projected_response(rows, spec, response)
+    return rows
 
 
 @router.get("/barcode/{barcode}", response_model=ItemResponse)
 def get_item_by_barcode(barcode: str, db: Session = Depends(get_db)):
     """Get an item by its barcode."""
+    cached = item_cache.get(barcode)
+    if cached:
+        return cached.item
     item = db.query(Item).filter(Item.barcode == barcode).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -47,6 +82,9 @@ def create_item(item: ItemCreate, db: Session = Depends(get_db)):
     db.add(db_item)
     db.commit()
     db.refresh(db_item)
+    item_cache.invalidate(db_item.barcode, db_item.category)
+    item_cache.invalidate_similar()
+    events.publish_change([db_item.id])
     return db_item
 
 
@@ -57,11 +95,18 @@ def update_item(item_id: int, item: ItemUpdate, db: Session = Depends(get_db)):
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
     
+    old_barcode, old_category = db_item.barcode, db_item.category
+    old_features = (db_item.name, db_item.brand, db_item.category)
     for key, value in item.model_dump(exclude_unset=True).items():
         setattr(db_item, key, value)
     
     db.commit()
     db.refresh(db_item)
+    item_cache.invalidate(old_barcode, old_category, db_item.category)
+    item_cache.invalidate(db_item.barcode)
+    if (db_item.name, db_item.brand, db_item.category) != old_features:
+        item_cache.invalidate_similar()
+    events.publish_change([item_id])
     return db_item
 
 
@@ -73,7 +118,10 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Item not found")
     
     # Delete associated inventory first
+    barcode, category = db_item.barcode, db_item.category
     db.query(Inventory).filter(Inventory.item_id == item_id).delete()
     db.delete(db_item)
     db.commit()
+    item_cache.invalidate(barcode, category)
+    events.publish_change([item_id])
     return {"ok": True}
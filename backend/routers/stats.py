@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+
+from services import images, item_cache, off_index, product_cache
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/cache")
+def cache_stats():
+    """Hit/miss counters for the in-app caches since startup."""
+    return {
+        "off_lookup": product_cache.snapshot(),
+        "off_index": off_index.snapshot(),
+        "items": item_cache.snapshot(),
+        "images": images.snapshot(),
+    }
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse
+
+from services import images
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+# Thumbnails are named by content and source URLs by OFF image revision, so a
+# given URL always serves the same image
+CACHE_CONTROL = "public, max-age=2592000"  # 30 days
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match compares weakly: W/"x" matches "x"."""
+    return any(candidate.strip().removeprefix("W/") in (etag, "*") for candidate in if_none_match.split(","))
+
+
+@router.get("/thumb")
+async def thumbnail(src: str, request: Request):
+    """
+    A product image, resized and cached locally (see services/images.py).
+    Items' image_url points here; src must be on an allowed image host.
+    If the image can't be fetched, redirects to src.
+    """
+    if not images.enabled() or not images.allowed(src):
+        raise HTTPException(status_code=404, detail="Not a proxied image URL")
+    try:
+        path, name = await images.get(src)
+    except images.ImageUnavailable as e:
+        print(f"Error fetching image {e}")
+        return RedirectResponse(src, status_code=307, headers={"Cache-Control": "no-store"})
+
+    etag = f'"{name.split(".")[0]}"'
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": etag}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=images.MEDIA_TYPES[name.rsplit(".", 1)[1]], headers=headers)
@@ -1,6 +1,11 @@
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional, List
+from pydantic import BaseModel, Field, PlainSerializer
+from datetime import date, datetime
+from typing import Annotated, Optional, List
+
+from services import images
+
+# An image URL as sent to clients: OFF images go through the local proxy
+LocalImageUrl = Annotated[Optional[str], PlainSerializer(images.local_url, return_type=Optional[str])]
 
 
 # Item schemas
@@ -27,6 +32,7 @@ class ItemUpdate(BaseModel):
 
 class ItemResponse(ItemBase):
     id: int
+    image_url: LocalImageUrl = None
     created_at: datetime
     updated_at: datetime
 
@@ -70,10 +76,52 @@ class QuickAddRequest(BaseModel):
     name: Optional[str] = None  # If not provided, will look up
 
 
+class BatchOperation(BaseModel):
+    barcode: str
+    delta: float = 1  # positive to add, negative to remove
+    name: Optional[str] = None  # for new items; looked up if not provided
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(max_length=500)
+
+
+class BatchOperationResult(BaseModel):
+    barcode: str
+    ok: bool
+    created: bool = False
+    inventory: Optional[InventoryResponse] = None
+    error: Optional[str] = None
+
+
+class BatchResult(BaseModel):
+    results: List[BatchOperationResult]
+
+
+class InventoryChanges(BaseModel):
+    version: int  # pass as `since` next time
+    changed: List[InventoryResponse]
+    deleted: List[int]  # item ids no longer in inventory
+
+
+# Bulk import schemas
+class ImportLineError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: List[ImportLineError]  # the first 100
+
+
 # Combined response for scan results
 class SimilarItem(BaseModel):
     item: ItemResponse
     quantity: float = 0
+    score: Optional[float] = None  # 0-1 from the similarity engine; None for plain category matches
 
 class ScanResult(BaseModel):
     found_in_inventory: bool
@@ -81,3 +129,29 @@ class ScanResult(BaseModel):
     quantity: float = 0
     product_info: Optional[dict] = None  # From Open Food Facts if new
     similar_items: List[SimilarItem] = []
+
+
+# Analytics schemas
+class TopItem(BaseModel):
+    barcode: str
+    name: Optional[str] = None  # None if the barcode was never added as an item
+    scans: int
+    quantity: float
+
+
+class DailyActivity(BaseModel):
+    day: date
+    adds: int = 0
+    removes: int = 0
+    checks: int = 0
+    added_quantity: float = 0
+    removed_quantity: float = 0
+
+
+class Consumption(BaseModel):
+    barcode: str
+    name: Optional[str] = None
+    removed_quantity: float
+    per_day: float
+    quantity_left: float = 0
+    days_left: Optional[float] = None  # at the current rate
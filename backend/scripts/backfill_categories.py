@@ -2,24 +2,34 @@
 Migration script: backfill OFF category for existing items.
 
 - Renames 'categories' column back to 'category' if needed
-- Fetches the mid-level OFF category tag for every item with a barcode
+- Fetches the mid-level OFF category tag for every item with a barcode,
+  concurrently and rate limited, writing results in chunks
+- Answers from the local OFF index or product_cache don't count against the
+  rate limit; only requests to OFF do
+- Resumable: an interrupted run picks up where it left off. Lookups that
+  failed (network or HTTP errors) are retried by the next run
 
 Usage:
     cd backend && uv run python scripts/backfill_categories.py           # only missing
     cd backend && uv run python scripts/backfill_categories.py --force   # re-fetch all
+    cd backend && uv run python scripts/backfill_categories.py --workers 8 --rate 5
 """
 
 import argparse
 import sqlite3
 import asyncio
 import sys
+import time
 from pathlib import Path
 
 # Add backend to path so we can import services
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from services.openfoodfacts import lookup_barcode
+from config import DATA_DIR, OFF_LOOKUP_MODE
+from database import engine, Base
+import models  # noqa: F401 - registers tables on Base
+from services import off_index, product_cache
+from services.openfoodfacts import fetch_product, close_client
 
-DATA_DIR = Path(__file__).parent.parent.parent / "data"
 DB_PATH = DATA_DIR / "inventory.db"
 
 
@@ -101,52 +111,174 @@ def migrate_schema(conn: sqlite3.Connection):
         print("Schema cleaned up.")
 
 
-async def backfill_categories(conn: sqlite3.Connection, force: bool = False):
+class TokenBucket:
+    """Allow `rate` acquisitions per second on average, in bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def local_answer(barcode: str, force: bool) -> tuple[bool, dict | None]:
+    """Answer a lookup without a request to OFF where lookup_barcode would:
+    from the local dump index or an unexpired product_cache entry. Returns
+    (answered, product). With force only offline mode answers locally."""
+    offline = OFF_LOOKUP_MODE == "offline"
+    if offline or (OFF_LOOKUP_MODE == "local-first" and not force):
+        product = off_index.get(barcode)
+        if product:
+            return True, product
+    if force and not offline:
+        return False, None
+    entry = product_cache.get(barcode)
+    if offline:
+        return True, entry.data if entry else None
+    if entry and entry.state != product_cache.EXPIRED:
+        return True, entry.data
+    return False, None
+
+
+def ensure_checkpoint(conn: sqlite3.Connection, restart: bool = False):
+    """Items already handled by an interrupted run, so a re-run can skip them."""
+    if restart:
+        conn.execute("DROP TABLE IF EXISTS backfill_checkpoint")
+    conn.execute("CREATE TABLE IF NOT EXISTS backfill_checkpoint (item_id INTEGER PRIMARY KEY)")
+    conn.commit()
+
+
+def write_chunk(conn: sqlite3.Connection, results: list[tuple[int, str | None]]):
+    """Apply a chunk of lookups and checkpoint them in one transaction."""
+    with conn:
+        conn.executemany(
+            "UPDATE items SET category = ? WHERE id = ?",
+            [(category, item_id) for item_id, category in results if category],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO backfill_checkpoint (item_id) VALUES (?)",
+            [(item_id,) for item_id, _ in results],
+        )
+
+
+async def backfill_categories(
+    conn: sqlite3.Connection,
+    force: bool = False,
+    workers: int = 4,
+    rate: float = 100 / 60,
+    chunk_size: int = 50,
+):
     """Fetch mid-level OFF category for items.
 
     By default only fetches for items missing a category.
     With --force, re-fetches for all items.
+
+    Lookups run on `workers` concurrent tasks, throttled to `rate` per second,
+    and results are written `chunk_size` at a time. Items finished by an
+    interrupted run are skipped; the checkpoint is cleared once a run completes
+    without failed lookups, which are left out of it so the next run retries them.
     """
-    if force:
-        cursor = conn.execute(
-            "SELECT id, barcode, name FROM items WHERE barcode IS NOT NULL AND barcode != 'null'"
-        )
-    else:
-        cursor = conn.execute(
-            "SELECT id, barcode, name FROM items "
-            "WHERE (category IS NULL OR category = '') "
-            "AND barcode IS NOT NULL AND barcode != 'null'"
-        )
-    items = cursor.fetchall()
+    query = (
+        "SELECT id, barcode FROM items "
+        "WHERE barcode IS NOT NULL AND barcode != 'null' "
+        "AND id NOT IN (SELECT item_id FROM backfill_checkpoint)"
+    )
+    if not force:
+        query += " AND (category IS NULL OR category = '')"
+    items = conn.execute(query + " ORDER BY id").fetchall()
 
     if not items:
         print("Nothing to backfill." if not force else "No items with valid barcodes found.")
+        conn.execute("DELETE FROM backfill_checkpoint")
+        conn.commit()
         return
 
     mode = "all" if force else "missing"
-    print(f"Fetching category for {len(items)} items ({mode}) from Open Food Facts...\n")
+    print(
+        f"Fetching category for {len(items)} items ({mode}) from Open Food Facts "
+        f"with {workers} workers at up to {rate:g} lookups/s...\n"
+    )
 
-    updated = 0
-    skipped = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
 
-    for item_id, barcode, name in items:
-        print(f"  [{item_id}] {name} ({barcode})...", end=" ", flush=True)
+    bucket = TokenBucket(rate, burst=workers)
+    pending: list[tuple[int, str | None]] = []
+    counts = {"updated": 0, "not_found": 0, "failed": 0}
+    start = time.perf_counter()
 
-        product = await lookup_barcode(barcode)
+    def flush():
+        write_chunk(conn, pending)
+        done = sum(counts.values())
+        elapsed = time.perf_counter() - start
+        print(
+            f"  [{done}/{len(items)}] updated {counts['updated']}, "
+            f"not found {counts['not_found']}, failed {counts['failed']} ({done / elapsed:.1f} items/s)"
+        )
+        pending.clear()
 
-        if product and product.get("category"):
-            conn.execute(
-                "UPDATE items SET category = ? WHERE id = ?",
-                (product["category"], item_id),
-            )
-            conn.commit()
-            print(f"✓ {product['category']}")
-            updated += 1
-        else:
-            print("✗ not found in OFF")
-            skipped += 1
+    async def worker():
+        while not queue.empty():
+            item_id, barcode = queue.get_nowait()
+            answered, product = await asyncio.to_thread(local_answer, barcode, force)
+            if not answered:
+                await bucket.acquire()
+                try:
+                    product = await fetch_product(barcode)
+                except Exception as e:
+                    counts["failed"] += 1
+                    print(f"  Error looking up barcode {barcode}: {e}")
+                    continue
+                await asyncio.to_thread(product_cache.put, barcode, product)
+            category = product.get("category") if product else None
+            counts["updated" if category else "not_found"] += 1
+            pending.append((item_id, category))
+            if len(pending) >= chunk_size:
+                flush()
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    if pending:
+        flush()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"\nDone. Updated: {counts['updated']}, Not found: {counts['not_found']}, "
+        f"Failed: {counts['failed']} in {elapsed:.1f}s ({len(items) / elapsed:.1f} items/s)"
+    )
+    if counts["failed"]:
+        print("Run again to retry the failed lookups.")
+    else:
+        conn.execute("DELETE FROM backfill_checkpoint")
+        conn.commit()
 
-    print(f"\nDone. Updated: {updated}, Not found: {skipped}")
+
+def positive_float(value: str) -> float:
+    number = float(value)
+    if not number > 0:  # also rejects nan
+        raise argparse.ArgumentTypeError(f"must be positive, not {value}")
+    return number
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return number
 
 
 async def main():
@@ -155,6 +287,16 @@ async def main():
         "--force", action="store_true",
         help="Re-fetch category for all items, not just those missing one"
     )
+    parser.add_argument("--workers", type=positive_int, default=4, help="Concurrent lookups (default: 4)")
+    parser.add_argument(
+        "--rate", type=positive_float, default=100 / 60,
+        help="Max OFF lookups per second (default: 1.67, OFF's 100 requests/min limit)"
+    )
+    parser.add_argument("--chunk-size", type=positive_int, default=50, help="Items written per transaction")
+    parser.add_argument(
+        "--restart", action="store_true",
+        help="Ignore progress saved by an interrupted run"
+    )
     args = parser.parse_args()
 
     if not DB_PATH.exists():
@@ -164,8 +306,14 @@ async def main():
     conn = sqlite3.connect(str(DB_PATH))
     try:
         migrate_schema(conn)
-        await backfill_categories(conn, force=args.force)
+        Base.metadata.create_all(bind=engine)  # product_cache, if the server hasn't created it yet
+        ensure_checkpoint(conn, restart=args.restart)
+        await backfill_categories(
+            conn, force=args.force, workers=args.workers,
+            rate=args.rate, chunk_size=args.chunk_size,
+        )
     finally:
+        await close_client()
         conn.close()
 
 
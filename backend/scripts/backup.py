@@ -0,0 +1,73 @@
+"""
+Take, list or restore snapshots of the database (see services/backups.py).
+
+Snapshots can be taken while the app is running; it also takes one every
+ALMNTSHN_BACKUP_INTERVAL seconds. Stop the app before restoring. The current
+database is saved as a pre-restore-<time>.db snapshot first, so a restore can
+be undone by restoring that.
+
+Usage:
+    cd backend && uv run python scripts/backup.py create
+    cd backend && uv run python scripts/backup.py list
+    cd backend && uv run python scripts/backup.py restore latest
+    cd backend && uv run python scripts/backup.py restore inventory-20261017-031500.db
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add backend to path so we can import services
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import BACKUP_DIR
+from database import DATABASE_PATH
+from services import backups
+
+
+def find_snapshot(name: str) -> Path:
+    """"latest", a snapshot's file name in the backup directory, or a path."""
+    if name == "latest":
+        existing = backups.snapshots()
+        if not existing:
+            sys.exit(f"No snapshots in {BACKUP_DIR}")
+        return existing[-1]
+    for path in (BACKUP_DIR / name, Path(name)):
+        if path.is_file():
+            return path
+    sys.exit(f"No snapshot {name} (see: scripts/backup.py list)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up or restore the database.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("create", help="Take a snapshot now")
+    subcommands.add_parser("list", help="List snapshots, oldest first")
+    restore = subcommands.add_parser("restore", help="Replace the database with a snapshot (stop the app first)")
+    restore.add_argument("snapshot", help='"latest", a file name from list, or a path')
+    args = parser.parse_args()
+
+    if args.command == "create":
+        if hasattr(os, "nice"):
+            os.nice(19)  # like the app's scheduled backups: requests go first
+        path = backups.create()
+        print(f"Snapshot {path} in {backups.stats['last_seconds']:.1f}s "
+              f"({backups.stats['last_bytes'] / 1024 / 1024:.1f} MiB, {backups.stats['restarts']} restarts)")
+    elif args.command == "list":
+        for path in backups.snapshots():
+            stat = path.stat()
+            print(f"{path.name}  {stat.st_size / 1024 / 1024:8.1f} MiB  "
+                  f"{datetime.fromtimestamp(stat.st_mtime):%Y-%m-%d %H:%M:%S}")
+    else:
+        snapshot = find_snapshot(args.snapshot)
+        start = time.perf_counter()
+        saved = backups.restore(snapshot)
+        print(f"Restored {DATABASE_PATH} from {snapshot.name} in {time.perf_counter() - start:.1f}s")
+        if saved:
+            print(f"The previous database was saved as {saved}")
+
+
+if __name__ == "__main__":
+    main()
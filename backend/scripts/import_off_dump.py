@@ -0,0 +1,108 @@
+"""
+Build the local Open Food Facts index from an official OFF dump, for fast and
+offline barcode lookups (see services/off_index.py and ALMNTSHN_OFF_LOOKUP_MODE).
+
+Accepts the JSONL dump (openfoodfacts-products.jsonl.gz) or the tab-separated
+CSV export (en.openfoodfacts.org.products.csv.gz), gzipped or not. The dump is
+read as a stream, one product at a time, and only the fields lookup_barcode()
+returns are kept, so the multi-gigabyte dump never has to fit in memory. The
+new index replaces the old one atomically once complete.
+
+Usage:
+    cd backend && uv run python scripts/import_off_dump.py openfoodfacts-products.jsonl.gz
+    cd backend && uv run python scripts/import_off_dump.py en.openfoodfacts.org.products.csv.gz
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+from typing import IO, Iterator
+
+# Add backend to path so we can import services
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import OFF_INDEX_PATH
+from services import off_index
+from services.openfoodfacts import product_info
+
+PROGRESS_EVERY = 100_000
+
+
+def open_dump(path: Path) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def dump_format(path: Path) -> str:
+    name = path.name.lower().removesuffix(".gz")
+    return "csv" if name.endswith((".csv", ".tsv")) else "jsonl"
+
+
+def read_jsonl(file: IO[str]) -> Iterator[dict]:
+    for line in file:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # truncated last line of an interrupted download
+
+
+def read_csv(file: IO[str]) -> Iterator[dict]:
+    """Rows of the CSV export, shaped like API products (the export is
+    tab-separated and lists categories_tags comma-separated)."""
+    csv.field_size_limit(sys.maxsize)
+    header = file.readline()
+    delimiter = "\t" if "\t" in header else ","
+    fields = next(csv.reader([header], delimiter=delimiter))
+    for row in csv.DictReader(file, fieldnames=fields, delimiter=delimiter):
+        tags = row.get("categories_tags") or ""
+        yield {
+            "code": row.get("code"),
+            "product_name": row.get("product_name"),
+            "product_name_en": row.get("product_name_en"),
+            "brands": row.get("brands"),
+            "categories_tags": [t for t in tags.split(",") if t],
+            "image_front_small_url": row.get("image_front_small_url") or row.get("image_small_url"),
+            "image_url": row.get("image_url"),
+            "quantity": row.get("quantity"),
+        }
+
+
+def products(records: Iterator[dict], progress: dict) -> Iterator[tuple[str, dict]]:
+    """(barcode, product info) for each record with a barcode; empty strings become None."""
+    for record in records:
+        progress["read"] += 1
+        if progress["read"] % PROGRESS_EVERY == 0:
+            print(f"  {progress['read']:,} records read...")
+        code = str(record.get("code") or "").strip()
+        if not code:
+            continue
+        info = product_info(record)
+        yield code, {key: value or None for key, value in info.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local OFF index from a dump.")
+    parser.add_argument("dump", type=Path, help="OFF JSONL or CSV dump, optionally gzipped")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Default: from the file name")
+    parser.add_argument("--output", type=Path, default=OFF_INDEX_PATH, help=f"Default: {OFF_INDEX_PATH}")
+    args = parser.parse_args()
+
+    fmt = args.format or dump_format(args.dump)
+    progress = {"read": 0}
+    start = time.perf_counter()
+    with open_dump(args.dump) as file:
+        records = read_csv(file) if fmt == "csv" else read_jsonl(file)
+        total = off_index.build(products(records, progress), args.output)
+
+    elapsed = time.perf_counter() - start
+    size = args.output.stat().st_size / 1e6
+    print(f"Indexed {total:,} products from {progress['read']:,} records in {elapsed:.1f}s ({size:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Export or import the inventory as NDJSON or CSV, e.g. to move it to another
+machine or seed a fresh database. Same format and upsert-by-barcode semantics
+as GET /api/inventory/export and POST /api/inventory/import; the format
+follows the file extension unless --format is given.
+
+Usage:
+    cd backend && uv run python scripts/transfer.py export inventory.ndjson
+    cd backend && uv run python scripts/transfer.py export - --format csv > inventory.csv
+    cd backend && uv run python scripts/transfer.py import inventory.csv
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path so we can import services
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import DATA_DIR
+from database import engine, Base
+import models  # noqa: F401 - registers tables on Base
+from services import transfer
+from services.changes import ensure_change_tracking
+from services.search import ensure_search_index
+
+
+def file_format(path: str, fmt: str) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def export(path: str, fmt: str):
+    out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+    try:
+        for chunk in transfer.export_stream(engine, fmt):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def import_(path: str, fmt: str, chunk_size: int):
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    ensure_change_tracking(engine)
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+    with source:
+        summary = transfer.import_records(engine, transfer.read_records(source, fmt), chunk_size)
+    for error in summary["errors"]:
+        print(f"  line {error['line']}: {error['error']}", file=sys.stderr)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import the inventory.")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="File to write or read, - for stdout/stdin")
+    parser.add_argument("--format", choices=transfer.FORMATS, help="Default: from the file extension")
+    parser.add_argument(
+        "--chunk-size", type=int, default=transfer.IMPORT_CHUNK,
+        help=f"Records per transaction when importing (default: {transfer.IMPORT_CHUNK})",
+    )
+    args = parser.parse_args()
+    fmt = file_format(args.path, args.format)
+
+    start = time.perf_counter()
+    if args.command == "export":
+        export(args.path, fmt)
+        print(f"Exported in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    else:
+        summary = import_(args.path, fmt, args.chunk_size)
+        print(
+            f"Imported in {time.perf_counter() - start:.1f}s: {summary['created']} created, "
+            f"{summary['updated']} updated, {summary['failed']} failed",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Production entry point: the app in several uvicorn worker processes sharing
+the one SQLite database.
+
+Runs startup.prepare() (data directory, schema, indexes, triggers, built
+frontend) once, then starts the workers, which skip it and only import the
+app. In WAL mode (the "performance" SQLite profile) the workers read
+concurrently and take turns on the database's write lock, waiting up to its
+busy timeout. Workers are told how many of them there are (ALMNTSHN_WORKERS),
+so per-process state adapts: the scan result cache is off and the change feed
+follows the database's change log (see services/events.py). Each worker logs
+its cold-start time when it is ready.
+
+Usage:
+    cd backend && uv run python serve.py [--workers 4] [--host 0.0.0.0] [--port 8000]
+"""
+
+import argparse
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the app with several worker processes.")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("ALMNTSHN_WORKERS") or os.cpu_count() or 1),
+                        help="Worker processes (default: ALMNTSHN_WORKERS, or one per CPU)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--access-log", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    # Before importing the app, which reads them (and so do the workers, from the environment)
+    os.environ["ALMNTSHN_WORKERS"] = str(args.workers)
+    os.environ["ALMNTSHN_PREPARED"] = "1"
+
+    # Only what prepare() needs: the workers import the app themselves
+    start = time.perf_counter()
+    import uvicorn
+    from database import engine
+    from startup import prepare
+
+    prepare()
+    engine.dispose()  # the workers open their own connections
+    print(f"Prepared the database in {(time.perf_counter() - start) * 1000:.0f} ms; starting {args.workers} workers")
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        access_log=args.access_log,
+        proxy_headers=True,
+        timeout_graceful_shutdown=10,  # then cancel what's still running, so the app's shutdown runs
+    )
+
+
+if __name__ == "__main__":
+    main()
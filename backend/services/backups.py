@@ -0,0 +1,254 @@
+"""
+Online backups of the SQLite database.
+
+A snapshot is copied with SQLite's backup API ALMNTSHN_BACKUP_STEP_PAGES pages
+at a time, pausing ALMNTSHN_BACKUP_STEP_PAUSE seconds between steps, so the
+copy's disk reads come in short bursts that requests can get in between. In WAL
+mode (the "performance" profile) the copy runs in one read transaction: every
+step copies the same version of the database and writers carry on meanwhile.
+Otherwise a write restarts the copy and steps only hold the read lock while
+they copy; after MAX_RESTARTS restarts the rest is copied in a single step,
+blocking writers until it's done.
+
+Snapshots are self-contained database files (no -wal next to them) named
+inventory-<UTC time>.db under ALMNTSHN_BACKUP_DIR. Each is written under a
+temporary name, checked with PRAGMA quick_check and only then renamed, so a
+crash never leaves a partial snapshot. The newest ALMNTSHN_BACKUP_KEEP are kept.
+The app takes one every ALMNTSHN_BACKUP_INTERVAL seconds, in a thread at the
+lowest CPU priority; with several workers, a lock file makes sure only one of
+them does. scripts/backup.py takes, lists
+and restores snapshots from the command line.
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from config import BACKUP_DIR, BACKUP_INTERVAL, BACKUP_KEEP, BACKUP_STEP_PAGES, BACKUP_STEP_PAUSE
+from database import DATABASE_PATH
+
+try:
+    import fcntl  # POSIX; elsewhere each worker process runs its own schedule
+except ImportError:
+    fcntl = None
+
+MAX_RESTARTS = 3
+RETRY_INTERVAL = 600  # seconds; also the wait before the first scheduled backup after startup
+STALE_TEMP_AGE = 3600  # seconds; temporary files this old were left by a crash
+
+# Marks every item changed after a restore, so clients' delta syncs pick up the restored rows
+MARK_CHANGED = """
+    INSERT INTO item_changes (item_id, version)
+    SELECT ?, version FROM data_version WHERE id = 1
+    ON CONFLICT (item_id) DO UPDATE SET version = excluded.version
+"""
+
+_lock = threading.Lock()
+_scheduler: Optional[asyncio.Task] = None
+
+stats = {"snapshots": 0, "failures": 0, "restarts": 0, "last_seconds": 0.0, "last_bytes": 0, "last_completed": 0.0}
+
+
+class BackupError(Exception):
+    """A snapshot couldn't be taken, or failed its integrity check."""
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def snapshots() -> list[Path]:
+    """The scheduled and on-demand snapshots, oldest first."""
+    return sorted(BACKUP_DIR.glob("inventory-*.db"))
+
+
+def _copy(source_path: Path, target_path: Path, step_pages: int, step_pause: float) -> int:
+    """Copy a database with the backup API; returns how often the copy was restarted."""
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining >= last_remaining:  # a write elsewhere restarted the copy
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise _TooManyRestarts
+        last_remaining = remaining
+        if remaining and step_pause > 0:
+            time.sleep(step_pause)
+
+    with closing(sqlite3.connect(source_path)) as source, closing(sqlite3.connect(target_path)) as target:
+        if source.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            # A read transaction pins the version being copied, so writes don't restart the copy
+            source.execute("BEGIN")
+            source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        try:
+            source.backup(target, pages=step_pages, progress=progress)
+        except _TooManyRestarts:
+            source.backup(target)
+        source.rollback()
+        target.execute("PRAGMA journal_mode = DELETE")  # the header says WAL, like the source's
+    return restarts
+
+
+def _check(path: Path):
+    with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as db:
+        result = db.execute("PRAGMA quick_check").fetchone()[0]
+    if result != "ok":
+        raise BackupError(f"{path.name} failed its integrity check: {result}")
+
+
+def create(prefix: str = "inventory", step_pages: int = BACKUP_STEP_PAGES,
+           step_pause: float = BACKUP_STEP_PAUSE) -> Path:
+    """Take a snapshot of the database now and rotate old ones; returns its path.
+    Safe to call while the app is running. step_pages <= 0 copies in one step."""
+    if not DATABASE_PATH.exists():
+        raise BackupError(f"{DATABASE_PATH} does not exist")
+    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+    temp = BACKUP_DIR / f".{prefix}.{os.getpid()}.{threading.get_ident()}.tmp"
+    started = time.perf_counter()
+    try:
+        restarts = _copy(DATABASE_PATH, temp, step_pages, step_pause)
+        _check(temp)
+        with open(temp, "rb") as f:
+            os.fsync(f.fileno())
+        path = BACKUP_DIR / f"{prefix}-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.db"
+        os.replace(temp, path)
+    except Exception as e:
+        temp.unlink(missing_ok=True)
+        stats["failures"] += 1
+        if isinstance(e, sqlite3.Error):
+            raise BackupError(str(e)) from e
+        raise
+    stats["snapshots"] += 1
+    stats["restarts"] += restarts
+    stats["last_seconds"] = time.perf_counter() - started
+    stats["last_bytes"] = path.stat().st_size
+    stats["last_completed"] = time.time()
+    _rotate()
+    return path
+
+
+def _rotate():
+    for path in snapshots()[:-max(1, BACKUP_KEEP)]:
+        path.unlink(missing_ok=True)
+    for path in BACKUP_DIR.glob(".*.tmp"):
+        if time.time() - path.stat().st_mtime > STALE_TEMP_AGE:
+            path.unlink(missing_ok=True)
+
+
+def _change_state(db: sqlite3.Connection) -> tuple[int, set]:
+    """The data version and item ids of a database (nothing, if it predates change tracking)."""
+    try:
+        version = db.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+        return (version[0] if version else 0), {row[0] for row in db.execute("SELECT id FROM items")}
+    except sqlite3.OperationalError:
+        return 0, set()
+
+
+def restore(snapshot: Path) -> Optional[Path]:
+    """Replace the database's contents with a snapshot's. Stop the app first:
+    its caches and open connections would not notice. The current contents are
+    saved as a pre-restore-<time>.db snapshot (not rotated), whose path is returned.
+
+    The data version continues from the current database's, and every item is
+    marked changed, so clients holding the current list sync to the restored one."""
+    _check(snapshot)
+    saved = create("pre-restore", step_pages=-1) if DATABASE_PATH.exists() else None
+    DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(DATABASE_PATH)) as target:
+        version, item_ids = _change_state(target)
+        with closing(sqlite3.connect(f"file:{snapshot}?mode=ro", uri=True)) as source:
+            source.backup(target)
+        with target:
+            target.execute("UPDATE data_version SET version = max(version, ?) + 1 WHERE id = 1", (version,))
+            item_ids |= _change_state(target)[1]
+            target.executemany(MARK_CHANGED, [(item_id,) for item_id in sorted(item_ids)])
+    return saved
+
+
+def _seconds_until_due() -> float:
+    existing = snapshots()
+    if not existing:
+        return 0.0
+    return existing[-1].stat().st_mtime + BACKUP_INTERVAL - time.time()
+
+
+def _scheduled():
+    """Take the scheduled snapshot, unless another thread or worker process is, or just did."""
+    if not _lock.acquire(blocking=False):
+        return
+    try:
+        BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+        with open(BACKUP_DIR / ".lock", "w") as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+            if _seconds_until_due() > 0:
+                return
+            path = create()
+            print(f"Backed up the database to {path.name} in {stats['last_seconds']:.1f}s "
+                  f"({stats['last_bytes'] / 1024 / 1024:.1f} MiB)")
+    finally:
+        _lock.release()
+
+
+async def in_background(func, *args, **kwargs):
+    """Run func in a thread of its own at the lowest CPU priority (nice is per
+    thread on Linux), so a backup only gets the CPU time requests leave idle."""
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def settle(result, error):
+        if done.done():  # the scheduler was stopped meanwhile
+            return
+        if error:
+            done.set_exception(error)
+        else:
+            done.set_result(result)
+
+    def run():
+        if sys.platform == "linux":
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        try:
+            result, error = func(*args, **kwargs), None
+        except Exception as e:
+            result, error = None, e
+        loop.call_soon_threadsafe(settle, result, error)
+
+    threading.Thread(target=run, name="backup", daemon=True).start()
+    return await done
+
+
+async def _back_up_periodically():
+    while True:
+        await asyncio.sleep(max(RETRY_INTERVAL, _seconds_until_due()))
+        try:
+            await in_background(_scheduled)
+        except Exception as e:
+            print(f"Error backing up the database: {e}")
+
+
+def start():
+    global _scheduler
+    if BACKUP_INTERVAL > 0 and _scheduler is None:
+        _scheduler = asyncio.create_task(_back_up_periodically())
+
+
+def stop():
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.cancel()
+        _scheduler = None
+
+
+def snapshot() -> dict:
+    return dict(stats)
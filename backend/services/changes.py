@@ -0,0 +1,79 @@
+"""
+Change tracking for the inventory list: a data version for ETags and a change
+log for delta sync.
+
+Triggers on items and inventory bump the single-row data_version counter and
+record, per item, the version of its latest change in item_changes. Clients
+remember the version of the list they hold (X-Inventory-Version) and ask for
+what changed since: items whose inventory row still exists are sent in full,
+the others as deleted ids. Because the triggers live in the database, writes
+from scripts and bulk imports are tracked too.
+"""
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, joinedload
+
+from models import DataVersion, Inventory, ItemChange
+
+
+def _trigger(name: str, event: str, table: str, item_id: str) -> str:
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN
+            UPDATE data_version SET version = version + 1 WHERE id = 1;
+            INSERT INTO item_changes (item_id, version)
+            SELECT {item_id}, version FROM data_version WHERE id = 1
+            ON CONFLICT (item_id) DO UPDATE SET version = excluded.version;
+        END
+    """
+
+
+CHANGES_DDL = {
+    "items_changes_insert": _trigger("items_changes_insert", "INSERT", "items", "new.id"),
+    "items_changes_update": _trigger("items_changes_update", "UPDATE", "items", "new.id"),
+    "items_changes_delete": _trigger("items_changes_delete", "DELETE", "items", "old.id"),
+    "inventory_changes_insert": _trigger("inventory_changes_insert", "INSERT", "inventory", "new.item_id"),
+    "inventory_changes_update": _trigger("inventory_changes_update", "UPDATE", "inventory", "new.item_id"),
+    "inventory_changes_delete": _trigger("inventory_changes_delete", "DELETE", "inventory", "old.item_id"),
+}
+
+
+def ensure_change_tracking(engine: Engine):
+    """Create the version row and the triggers if missing (tables come from create_all)."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+        for statement in CHANGES_DDL.values():
+            conn.exec_driver_sql(statement)
+
+
+def begin_read(db: Session):
+    """Run the session's following queries in one read transaction, so they all
+    see the same version of the database. pysqlite doesn't open a transaction
+    for SELECTs: without this, a write can commit between two of them. The
+    transaction ends when the session is closed."""
+    connection = db.connection()
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
+
+
+def current_version(db: Session) -> int:
+    return db.scalar(select(DataVersion.version).where(DataVersion.id == 1)) or 0
+
+
+def etag(version: int) -> str:
+    return f'W/"inventory-{version}"'
+
+
+def etag_matches(if_none_match: str, version: int) -> bool:
+    tag = etag(version)
+    return any(candidate.strip() in (tag, "*") for candidate in if_none_match.split(","))
+
+
+def changes_since(db: Session, since: int) -> tuple[list, list]:
+    """(inventory rows changed after version since, ids of items no longer in inventory)."""
+    changed_ids = select(ItemChange.item_id).where(ItemChange.version > since)
+    changed = db.query(Inventory).options(joinedload(Inventory.item)).filter(
+        Inventory.item_id.in_(changed_ids)
+    ).order_by(Inventory.id).all()
+    present = {inv.item_id for inv in changed}
+    deleted = [item_id for item_id in db.scalars(changed_ids.order_by(ItemChange.item_id)) if item_id not in present]
+    return changed, deleted
@@ -0,0 +1,210 @@
+"""
+In-process pub/sub of inventory and item changes, for the /events stream.
+
+Writers call publish() after committing, from whichever thread they run in;
+the message is formatted once and handed to the event loop, which copies it
+into every subscriber's bounded queue without waiting. A subscriber that falls
+QUEUE_SIZE messages behind has its backlog replaced by a single "resync"
+message (reload via /inventory/changes), so one slow phone can neither hold
+up writers nor grow memory without bound.
+
+With several worker processes (see serve.py) a phone's stream is held by one
+worker while its neighbour's changes are written by another, so changes are
+announced from the database instead: each worker watches the data version
+(checking every POLL_INTERVAL, and at once after its own writes) and announces
+the items changed since it last looked, from the item_changes log.
+
+Streams never end by themselves, and uvicorn waits for every response to finish
+before running the app's shutdown (flushing the scan log, among others), so
+reloads and Ctrl-C would hang for as long as a phone is connected. Streams are
+therefore ended as soon as the server is told to exit (SIGINT or SIGTERM);
+EventSource reconnects to the next server on its own.
+"""
+import asyncio
+import json
+import signal
+import threading
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+
+from config import WORKERS
+from database import SessionLocal
+from models import ItemChange
+from services import changes
+
+QUEUE_SIZE = 100  # messages buffered per subscriber before it is told to resync
+HEARTBEAT = 15  # seconds between keep-alive comments, so proxies keep idle streams open
+RESYNC = "event: resync\ndata: {}\n\n"
+KEEPALIVE = ": keepalive\n\n"
+CLOSE = None  # queued to end a stream
+POLL_INTERVAL = 0.5  # seconds between checks for other workers' changes
+MAX_CHANGED_IDS = 500  # more changes at once (e.g. an import) are announced as a resync
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_heartbeat: Optional[asyncio.Task] = None
+_watcher: Optional[asyncio.Task] = None
+_wake: Optional[asyncio.Event] = None
+_subscribers: set[asyncio.Queue] = set()
+_closing = False
+_signal_handlers: dict = {}  # the server's, restored by stop()
+
+stats = {"published": 0, "delivered": 0, "resyncs": 0}
+
+
+def start():
+    """Bind to the running loop; until then publish() is a no-op (e.g. in scripts)."""
+    global _loop, _heartbeat, _watcher, _wake, _closing
+    _loop = asyncio.get_running_loop()
+    _closing = False
+    _heartbeat = asyncio.create_task(_send_heartbeats())
+    if WORKERS > 1:
+        _wake = asyncio.Event()
+        _watcher = asyncio.create_task(_watch_changes())
+    if threading.current_thread() is threading.main_thread():  # where the server handles signals
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            _signal_handlers[sig] = signal.signal(sig, _on_exit_signal)
+
+
+def stop():
+    global _loop, _heartbeat, _watcher, _wake
+    _loop = None
+    for task in (_heartbeat, _watcher):
+        if task is not None:
+            task.cancel()
+    _heartbeat = _watcher = _wake = None
+    for sig, handler in _signal_handlers.items():
+        if signal.getsignal(sig) is _on_exit_signal:
+            signal.signal(sig, handler)
+    _signal_handlers.clear()
+
+
+def _on_exit_signal(sig, frame):
+    """End the streams, then let the server's own handler begin its shutdown."""
+    loop = _loop
+    if loop is not None:
+        try:
+            loop.call_soon_threadsafe(close_streams)
+        except RuntimeError:  # loop already closed
+            pass
+    handler = _signal_handlers.get(sig)
+    if callable(handler):
+        handler(sig, frame)
+    elif handler == signal.SIG_DFL:
+        signal.signal(sig, signal.SIG_DFL)
+        signal.raise_signal(sig)
+
+
+def close_streams():
+    """End every open stream, and any opened from now on."""
+    global _closing
+    _closing = True
+    for queue in _subscribers:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(CLOSE)
+
+
+async def _send_heartbeats():
+    # One timer for all streams, rather than a timeout on every subscriber's get()
+    while True:
+        await asyncio.sleep(HEARTBEAT)
+        for queue in _subscribers:
+            if queue.empty() and not _closing:
+                queue.put_nowait(KEEPALIVE)
+
+
+def subscribe() -> asyncio.Queue:
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    if _closing:
+        queue.put_nowait(CLOSE)
+    else:
+        _subscribers.add(queue)
+    return queue
+
+
+def unsubscribe(queue: asyncio.Queue):
+    _subscribers.discard(queue)
+
+
+def publish(event: str, **data):
+    """Broadcast an event to every subscriber. Safe to call from any thread."""
+    loop = _loop
+    if loop is None or not _subscribers:
+        return
+    message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    try:
+        loop.call_soon_threadsafe(_fan_out, message)
+    except RuntimeError:  # loop closed during shutdown
+        pass
+
+
+def publish_change(item_ids: Iterable[int]):
+    """Announce that these items (or their inventory) changed."""
+    loop, wake = _loop, _wake
+    if wake is not None:  # several workers: _watch_changes() announces every worker's changes, ours included
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:  # loop closed during shutdown
+            pass
+        return
+    publish("change", item_ids=sorted(set(item_ids)))
+
+
+def _changed_since(version: Optional[int]) -> tuple[int, list[int]]:
+    """The current data version and the items changed after version."""
+    with SessionLocal() as db:
+        current = changes.current_version(db)
+        if version is None or current == version:
+            return current, []
+        return current, list(db.scalars(select(ItemChange.item_id).where(ItemChange.version > version)))
+
+
+async def _watch_changes():
+    version = None
+    while True:
+        try:
+            await asyncio.wait_for(_wake.wait(), POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+        try:
+            version, item_ids = await asyncio.to_thread(_changed_since, version)
+        except Exception as e:
+            print(f"Error reading changes for the event feed: {e}")
+            continue
+        if len(item_ids) > MAX_CHANGED_IDS:
+            publish("resync")
+        elif item_ids:
+            publish("change", item_ids=sorted(item_ids))
+
+
+def _fan_out(message: str):
+    if _closing:
+        return
+    stats["published"] += 1
+    for queue in _subscribers:
+        try:
+            queue.put_nowait(message)
+            stats["delivered"] += 1
+        except asyncio.QueueFull:
+            _resync(queue)
+
+
+def _resync(queue: asyncio.Queue):
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(RESYNC)
+    stats["resyncs"] += 1
+
+
+def drain(queue: asyncio.Queue, first: str) -> str:
+    """first plus everything else already queued, to be sent in one write."""
+    messages = [first]
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return "".join(messages)
+
+
+def snapshot() -> dict:
+    return {**stats, "subscribers": len(_subscribers)}
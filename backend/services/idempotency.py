@@ -0,0 +1,84 @@
+"""
+Idempotency keys for quantity changes.
+
+A client sends an Idempotency-Key header with a change and the same key again
+when it retries. claim() inserts the key as the first write of the change's
+transaction, so SQLite's write lock orders requests with the same key; store()
+saves the response before the commit. The change and its stored answer
+therefore commit together: a retry either finds the answer and replays it, or
+finds nothing because the first attempt never committed, and applies the
+change itself. Keys are kept for ALMNTSHN_IDEMPOTENCY_KEY_TTL seconds.
+"""
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from config import IDEMPOTENCY_KEY_TTL
+from models import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+PRUNE_INTERVAL = 3600  # seconds between deletions of expired keys
+
+_last_prune = 0.0
+
+stats = {"claimed": 0, "replayed": 0}
+
+
+def fingerprint(request: BaseModel) -> str:
+    return hashlib.sha256(request.model_dump_json().encode()).hexdigest()
+
+
+def claim(db: Session, key: Optional[str], endpoint: str, request: BaseModel) -> Optional[Response]:
+    """Record key for this request; returns the stored response to replay if
+    the key was already used. No-op without a key. Starts the write transaction."""
+    if key is None:
+        return None
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+    digest = fingerprint(request)
+    inserted = db.execute(
+        insert(IdempotencyKey).values(key=key, endpoint=endpoint, fingerprint=digest).on_conflict_do_nothing()
+    ).rowcount
+    if inserted:
+        stats["claimed"] += 1
+        _prune(db)
+        return None
+
+    row = db.execute(
+        select(IdempotencyKey.endpoint, IdempotencyKey.fingerprint, IdempotencyKey.response)
+        .where(IdempotencyKey.key == key)
+    ).one()
+    db.rollback()
+    if row.endpoint != endpoint or row.fingerprint != digest:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    stats["replayed"] += 1
+    return Response(row.response, media_type="application/json", headers={"Idempotent-Replayed": "true"})
+
+
+def store(db: Session, key: Optional[str], response: BaseModel):
+    """Save the response for key, in the transaction that claim() started."""
+    if key is not None:
+        db.execute(
+            update(IdempotencyKey).where(IdempotencyKey.key == key).values(response=response.model_dump_json())
+        )
+
+
+def _prune(db: Session):
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=IDEMPOTENCY_KEY_TTL)
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+
+
+def snapshot() -> dict:
+    return dict(stats)
@@ -0,0 +1,223 @@
+"""
+Local proxy and thumbnail cache for product images.
+
+Items keep the Open Food Facts image URL they were created with; responses
+rewrite it (see ItemResponse) to /api/images/thumb?src=<url>, which fetches
+the image once, shrinks it to ALMNTSHN_IMAGE_THUMBNAIL_SIZE pixels and
+recompresses it as WebP when Pillow is installed (as is, otherwise), and serves
+it from disk from then on, so inventory lists don't reach out to OFF and still
+show images offline.
+
+The cache is content-addressed: thumbnails are stored under objects/ by the
+SHA-256 of their bytes (images shared by several URLs are stored once), and
+urls/ maps the SHA-256 of each source URL to its object. It is kept under
+ALMNTSHN_IMAGE_CACHE_MAX_MB by deleting the least recently used objects;
+references to a deleted object are dropped when next used. Only hosts in
+ALMNTSHN_IMAGE_HOSTS (and that of ALMNTSHN_OFF_BASE_URL) are fetched, so the
+proxy can't be pointed at arbitrary URLs.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+from config import (
+    IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_MB, IMAGE_HOSTS, IMAGE_MAX_CONNECTIONS, IMAGE_THUMBNAIL_SIZE, OFF_BASE_URL,
+)
+from services.single_flight import SingleFlight
+
+try:
+    import PIL  # optional: pip install pillow; its modules are imported on first use
+except ImportError:
+    PIL = None
+
+LOCAL_PREFIX = "/api/images/thumb?src="
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+TOUCH_INTERVAL = 3600  # seconds; how stale an object's last-used time may get
+RECOUNT_INTERVAL = 60  # seconds between recounts of the cache's size, which other workers add to
+MEDIA_TYPES = {"webp": "image/webp", "jpg": "image/jpeg", "png": "image/png", "gif": "image/gif"}
+EXTENSIONS = {media_type: ext for ext, media_type in MEDIA_TYPES.items()}
+
+_hosts = set(IMAGE_HOSTS) | {urlsplit(OFF_BASE_URL).hostname}
+# Image downloads get their own pool, apart from openfoodfacts' API client used on the scan path
+_client: Optional[httpx.AsyncClient] = None
+_inflight = SingleFlight()  # fetches by source URL
+_lock = threading.Lock()
+_size: Optional[int] = None  # bytes in objects/, counted on first write
+_counted_at = 0.0
+
+stats = {"hits": 0, "misses": 0, "fetch_errors": 0, "evictions": 0, "bytes": 0}
+
+
+class ImageUnavailable(Exception):
+    """The source image couldn't be fetched or isn't an image."""
+
+
+def enabled() -> bool:
+    return IMAGE_CACHE_MAX_MB > 0
+
+
+def allowed(url: str) -> bool:
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and parts.hostname in _hosts
+
+
+def local_url(url: Optional[str]) -> Optional[str]:
+    """The proxy URL for an image URL; other URLs (and None) are returned unchanged."""
+    if not url or not enabled() or not allowed(url):
+        return url
+    return LOCAL_PREFIX + quote(url, safe="")
+
+
+def _url_path(src: str) -> Path:
+    digest = hashlib.sha256(f"{IMAGE_THUMBNAIL_SIZE}:{src}".encode()).hexdigest()
+    return IMAGE_CACHE_DIR / "urls" / digest[:2] / digest
+
+
+def _object_path(name: str) -> Path:
+    return IMAGE_CACHE_DIR / "objects" / name[:2] / name
+
+
+def _write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client for image downloads, creating it if needed."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=IMAGE_MAX_CONNECTIONS,
+                max_keepalive_connections=IMAGE_MAX_CONNECTIONS,
+                keepalive_expiry=60.0,
+            ),
+            headers={"User-Agent": "almntshn/0.1.0 (home food inventory)"},
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def cached(src: str) -> Optional[tuple[Path, str]]:
+    """(object path, name) of the thumbnail of src if it's on disk."""
+    try:
+        name = _url_path(src).read_text()
+        path = _object_path(name)
+        if time.time() - path.stat().st_mtime > TOUCH_INTERVAL:
+            os.utime(path)  # marks it recently used, for eviction
+    except FileNotFoundError:  # never fetched, or evicted
+        return None
+    return path, name
+
+
+def thumbnail(data: bytes, media_type: str) -> tuple[bytes, str]:
+    """Shrink and recompress an image; returns (bytes, extension). Without
+    Pillow, or if it can't read the image, the image is kept as is."""
+    if PIL is not None:
+        from PIL import Image, ImageOps, features
+
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.draft("RGB", (IMAGE_THUMBNAIL_SIZE, IMAGE_THUMBNAIL_SIZE))  # JPEGs decode at a fraction of full size
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((IMAGE_THUMBNAIL_SIZE, IMAGE_THUMBNAIL_SIZE))
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+            out = io.BytesIO()
+            if features.check("webp"):
+                image.save(out, "WEBP", quality=80, method=4)
+                return out.getvalue(), "webp"
+            image.convert("RGB").save(out, "JPEG", quality=80, optimize=True, progressive=True)
+            return out.getvalue(), "jpg"
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            print(f"Error resizing image: {e}")
+    return data, EXTENSIONS[media_type]
+
+
+def _store(src: str, data: bytes, media_type: str) -> tuple[Path, str]:
+    """Thumbnail the fetched image and write it to the cache."""
+    data, ext = thumbnail(data, media_type)
+    name = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+    path = _object_path(name)
+    with _lock:
+        new = not path.exists()
+        if new:
+            _write_atomic(path, data)
+        _write_atomic(_url_path(src), name.encode())
+        if new:
+            _account(len(data))
+    return path, name
+
+
+def _account(added: int):
+    """Track the cache's size and evict the least recently used objects over the limit."""
+    global _size, _counted_at
+    if _size is None or time.monotonic() - _counted_at > RECOUNT_INTERVAL:
+        _size = sum(p.stat().st_size for p in (IMAGE_CACHE_DIR / "objects").glob("*/*"))
+        _counted_at = time.monotonic()
+    else:
+        _size += added
+    limit = IMAGE_CACHE_MAX_MB * 1024 * 1024
+    if _size > limit:
+        objects = sorted((p.stat().st_mtime, p.stat().st_size, p) for p in (IMAGE_CACHE_DIR / "objects").glob("*/*"))
+        _size = sum(size for _, size, _ in objects)
+        for _, size, path in objects:
+            if _size <= limit * 0.9:  # leave headroom, so eviction doesn't run on every write
+                break
+            path.unlink(missing_ok=True)
+            _size -= size
+            stats["evictions"] += 1
+    stats["bytes"] = _size
+
+
+async def _fetch(src: str) -> tuple[Path, str]:
+    try:
+        async with get_client().stream("GET", src) as response:
+            media_type = response.headers.get("content-type", "").split(";")[0].strip()
+            if response.status_code != 200 or media_type not in EXTENSIONS:
+                raise ImageUnavailable(f"{src}: HTTP {response.status_code}, {media_type or 'no content type'}")
+            data = bytearray()
+            async for chunk in response.aiter_bytes():
+                data += chunk
+                if len(data) > MAX_SOURCE_BYTES:
+                    raise ImageUnavailable(f"{src}: over {MAX_SOURCE_BYTES} bytes")
+    except ImageUnavailable:
+        stats["fetch_errors"] += 1
+        raise
+    except Exception as e:
+        stats["fetch_errors"] += 1
+        raise ImageUnavailable(f"{src}: {e}") from e
+    return await asyncio.to_thread(_store, src, bytes(data), media_type)
+
+
+async def get(src: str) -> tuple[Path, str]:
+    """(path, name) of the thumbnail of src, fetching it if it isn't cached;
+    concurrent requests for one image share a single fetch.
+    Raises ImageUnavailable if it can't be fetched."""
+    found = await asyncio.to_thread(cached, src)
+    if found:
+        stats["hits"] += 1
+        return found
+    stats["misses"] += 1
+    return await asyncio.shield(_inflight.task(src, lambda: _fetch(src)))
+
+
+def snapshot() -> dict:
+    return dict(stats)
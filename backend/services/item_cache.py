@@ -0,0 +1,139 @@
+"""
+In-process LRU cache of found-item scan results by barcode.
+
+Each entry is the ScanResult a scan of a known barcode returns (item, quantity
+and similar items), so repeat scans are answered from memory. Writers call
+invalidate() after committing, with the item's barcode and category, which drops
+the item's own entry, entries listing it as a similar item and entries of the
+same category (whose similar items it may now join). With the similarity
+engine an item can join the ranked similar items of any entry, so writes that
+may add one (a new item, a changed name, brand or category, or a quantity
+coming up from zero) also call invalidate_similar(), which drops them all. Entries also expire after
+ALMNTSHN_ITEM_CACHE_TTL seconds, bounding staleness from writes made outside
+this process (e.g. scripts). ALMNTSHN_ITEM_CACHE_SIZE=0 disables the cache; it
+is also off when serving with several workers, as one worker can't invalidate
+another's entries.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from config import ITEM_CACHE_SIZE, ITEM_CACHE_TTL
+from services import similarity
+
+
+class Entry(NamedTuple):
+    value: object
+    category: Optional[str]
+    related: tuple  # barcodes of the similar items in value
+    expires: float
+
+
+_entries: "OrderedDict[str, Entry]" = OrderedDict()
+_by_category: dict[str, set] = {}  # category -> cached barcodes of that category
+_by_related: dict[str, set] = {}  # barcode -> cached barcodes listing it as similar
+_lock = threading.Lock()
+_generation = 0  # bumped by every invalidation; see put()
+
+stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+
+def enabled() -> bool:
+    return ITEM_CACHE_SIZE > 0
+
+
+def generation() -> int:
+    """Read before loading from the database, then pass to put()."""
+    return _generation
+
+
+def get(barcode: str):
+    if not enabled():
+        return None
+    with _lock:
+        entry = _entries.get(barcode)
+        if entry is None or entry.expires < time.monotonic():
+            if entry is not None:
+                _drop(barcode)
+            stats["misses"] += 1
+            return None
+        _entries.move_to_end(barcode)
+        stats["hits"] += 1
+        return entry.value
+
+
+def put(barcode: str, value, category: Optional[str], loaded_at_generation: int, related: tuple = ()):
+    """Cache a value loaded from the database. Skipped if anything was invalidated
+    since loaded_at_generation, as the value may predate that write."""
+    if not enabled():
+        return
+    with _lock:
+        if loaded_at_generation != _generation:
+            return
+        _drop(barcode)
+        _entries[barcode] = Entry(value, category, related, time.monotonic() + ITEM_CACHE_TTL)
+        if category:
+            _by_category.setdefault(category, set()).add(barcode)
+        for other in related:
+            _by_related.setdefault(other, set()).add(barcode)
+        while len(_entries) > ITEM_CACHE_SIZE:
+            _drop(next(iter(_entries)))
+            stats["evictions"] += 1
+
+
+def invalidate(barcode: Optional[str], *categories: Optional[str]):
+    """Drop the entry for barcode, entries listing it and every entry in the given categories."""
+    global _generation
+    with _lock:
+        _generation += 1
+        stats["invalidations"] += 1
+        if barcode:
+            _drop(barcode)
+            for other in list(_by_related.get(barcode, ())):
+                _drop(other)
+        for category in categories:
+            for other in list(_by_category.get(category, ())):
+                _drop(other)
+
+
+def invalidate_similar():
+    """An item may have joined the similar items of cached results. Without the
+    similarity engine those are its category's, dropped by invalidate(); with
+    it they can be any, so every entry is dropped."""
+    if similarity.available():
+        clear()
+        stats["invalidations"] += 1
+
+
+def clear():
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.clear()
+        _by_category.clear()
+        _by_related.clear()
+
+
+def _drop(barcode: str):
+    entry = _entries.pop(barcode, None)
+    if entry is None:
+        return
+    for index, key in [(_by_category, entry.category), *((_by_related, other) for other in entry.related)]:
+        barcodes = index.get(key)
+        if barcodes is not None:
+            barcodes.discard(barcode)
+            if not barcodes:
+                del index[key]
+
+
+def snapshot() -> dict:
+    """Counters plus size and hit rate, for the stats endpoint."""
+    lookups = stats["hits"] + stats["misses"]
+    return {
+        **stats,
+        "enabled": enabled(),
+        "size": len(_entries),
+        "max_size": ITEM_CACHE_SIZE,
+        "hit_rate": round(stats["hits"] / lookups, 3) if lookups else None,
+    }
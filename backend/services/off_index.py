@@ -0,0 +1,114 @@
+"""
+Local barcode index built from an Open Food Facts dump.
+
+A separate, read-only SQLite file holding one row per product with exactly the
+fields lookup_barcode() returns, keyed by barcode in a WITHOUT ROWID table, so
+a lookup is a single primary-key B-tree search (a few microseconds). It is read
+with plain sqlite3 connections, one per thread, opened read-only. build() writes
+a new index next to the old one and swaps it in atomically; readers notice the
+new file and reopen.
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+from config import OFF_INDEX_PATH
+
+FIELDS = ["name", "brand", "category", "image_url", "quantity_info"]
+
+SCHEMA = """
+    CREATE TABLE products (
+        barcode TEXT PRIMARY KEY,
+        name TEXT,
+        brand TEXT,
+        category TEXT,
+        image_url TEXT,
+        quantity_info TEXT
+    ) WITHOUT ROWID
+"""
+LOOKUP = f"SELECT {', '.join(FIELDS)} FROM products WHERE barcode = ?"
+
+_local = threading.local()
+
+stats = {"hits": 0, "misses": 0}
+
+
+def available(path: Path = OFF_INDEX_PATH) -> bool:
+    return path.exists()
+
+
+def _connection(path: Path) -> Optional[sqlite3.Connection]:
+    """This thread's read-only connection, reopened if the file was replaced."""
+    try:
+        inode = path.stat().st_ino
+    except FileNotFoundError:
+        return None
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.inode != inode or _local.path != path:
+        if conn is not None:
+            conn.close()
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA mmap_size=268435456")
+        _local.conn, _local.inode, _local.path = conn, inode, path
+    return conn
+
+
+def get(barcode: str, path: Path = OFF_INDEX_PATH) -> Optional[dict]:
+    """Product info for a barcode in the same shape as lookup_barcode(), or None
+    if the barcode isn't in the index (or there is no index)."""
+    conn = _connection(path)
+    if conn is None:
+        return None
+    row = conn.execute(LOOKUP, (barcode,)).fetchone()
+    if row is None:
+        stats["misses"] += 1
+        return None
+    stats["hits"] += 1
+    return dict(zip(FIELDS, row))
+
+
+def count(path: Path = OFF_INDEX_PATH) -> int:
+    conn = _connection(path)
+    return conn.execute("SELECT count(*) FROM products").fetchone()[0] if conn else 0
+
+
+def build(products: Iterable[tuple[str, dict]], path: Path = OFF_INDEX_PATH, batch_size: int = 10000) -> int:
+    """Write (barcode, product info) pairs into a new index and swap it in.
+
+    The new file is built with journaling and syncs off (it isn't live until
+    the rename), in batches of batch_size rows. A barcode seen twice keeps its
+    last row. Returns the number of products in the new index.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(SCHEMA)
+        insert = f"INSERT OR REPLACE INTO products VALUES (?, {', '.join('?' for _ in FIELDS)})"
+        batch = []
+        for barcode, info in products:
+            batch.append((barcode, *(info.get(field) for field in FIELDS)))
+            if len(batch) >= batch_size:
+                conn.executemany(insert, batch)
+                batch = []
+        conn.executemany(insert, batch)
+        conn.commit()
+        conn.execute("VACUUM")  # compact pages left half-full by out-of-order inserts
+        total = conn.execute("SELECT count(*) FROM products").fetchone()[0]
+    finally:
+        conn.close()
+
+    os.replace(tmp, path)
+    return total
+
+
+def snapshot() -> dict:
+    """Counters plus index file size, for the stats endpoint."""
+    size = OFF_INDEX_PATH.stat().st_size if available() else None
+    return {**stats, "available": size is not None, "size_bytes": size}
@@ -1,6 +1,19 @@
+import asyncio
+import time
 import httpx
 from typing import Optional
 
+import metrics
+from config import OFF_BASE_URL, OFF_MAX_CONNECTIONS, OFF_LOOKUP_MODE
+from services import off_index, product_cache
+from services.single_flight import SingleFlight
+
+# App-lifetime HTTP client, opened/closed by main.py's lifespan (or lazily by scripts)
+_client: Optional[httpx.AsyncClient] = None
+
+# In-flight fetches by barcode, so concurrent lookups share one OFF request
+_inflight = SingleFlight()
+
 
 def pick_category(categories_tags: list[str]) -> Optional[str]:
     """Pick the mid-level OFF category tag for similarity matching.
@@ -15,30 +28,114 @@ def pick_category(categories_tags: list[str]) -> Optional[str]:
     return en_tags[len(en_tags) // 2]
 
 
-async def lookup_barcode(barcode: str) -> Optional[dict]:
+def product_info(product: dict) -> dict:
+    """The fields we keep from an OFF product (API response or dump record)."""
+    return {
+        "name": product.get("product_name") or product.get("product_name_en") or "Unknown",
+        "brand": product.get("brands"),
+        "category": pick_category(product.get("categories_tags") or []),
+        "image_url": product.get("image_front_small_url") or product.get("image_url"),
+        "quantity_info": product.get("quantity"),  # e.g., "500g"
+    }
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared, connection-pooling OFF client, creating it if needed."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=OFF_BASE_URL,
+            timeout=10.0,
+            limits=httpx.Limits(
+                max_connections=OFF_MAX_CONNECTIONS,
+                max_keepalive_connections=OFF_MAX_CONNECTIONS,
+                keepalive_expiry=60.0,
+            ),
+            headers={"User-Agent": "almntshn/0.1.0 (home food inventory)"},
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def fetch_product(barcode: str) -> Optional[dict]:
+    """
+    Fetch a barcode from the Open Food Facts API, bypassing the cache.
+    Returns product info if found, None if OFF doesn't know it.
+    Raises on network/HTTP errors so they are never cached as "not found".
+    """
+    start = time.perf_counter()
+    try:
+        response = await get_client().get(f"/api/v0/product/{barcode}.json")
+        response.raise_for_status()
+        data = response.json()
+    except Exception:
+        metrics.off_requests.inc("error")
+        raise
+    finally:
+        metrics.off_duration.observe(time.perf_counter() - start)
+
+    if data.get("status") == 1:  # Product found
+        metrics.off_requests.inc("found")
+        return product_info(data.get("product", {}))
+    metrics.off_requests.inc("not_found")
+    return None
+
+
+async def _fetch_and_cache(barcode: str) -> Optional[dict]:
+    product = await fetch_product(barcode)
+    await asyncio.to_thread(product_cache.put, barcode, product)
+    return product
+
+
+def _on_refreshed(barcode: str, task: asyncio.Task):
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        print(f"Error refreshing barcode {barcode}: {task.exception()}")
+    else:
+        product_cache.stats["refreshes"] += 1
+
+
+async def lookup_barcode(barcode: str, refresh: bool = False) -> Optional[dict]:
     """
     Look up a barcode in the Open Food Facts database.
     Returns product info if found, None otherwise.
+
+    Unless ALMNTSHN_OFF_LOOKUP_MODE is "online", the local dump index (see
+    off_index) is consulted first; in "offline" mode the API is never called
+    and only the index and cached answers are used. Otherwise answers come
+    from the product_cache table when possible: fresh entries are returned as
+    is, stale ones are returned and refreshed in the background, and expired
+    ones are only used if OFF can't be reached. Pass refresh=True to skip the
+    index and cache and re-fetch. Concurrent fetches of the same barcode share
+    a single request. Cache reads and writes run in a worker thread.
     """
-    url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
-    
+    if OFF_LOOKUP_MODE == "offline" or (OFF_LOOKUP_MODE == "local-first" and not refresh):
+        # a primary-key read of a local file, cheaper than a hop to a worker thread
+        product = off_index.get(barcode)
+        if product:
+            return product
+
+    entry = None if refresh else await asyncio.to_thread(product_cache.get, barcode)
+    if OFF_LOOKUP_MODE == "offline":
+        return entry.data if entry else None
+    if entry and entry.state == product_cache.FRESH:
+        return entry.data
+    if entry and entry.state == product_cache.STALE:
+        if barcode not in _inflight:
+            task = _inflight.task(barcode, lambda: _fetch_and_cache(barcode))
+            task.add_done_callback(lambda t: _on_refreshed(barcode, t))
+        return entry.data
+
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get("status") == 1:  # Product found
-                product = data.get("product", {})
-                categories_tags = product.get("categories_tags", [])
-                return {
-                    "name": product.get("product_name") or product.get("product_name_en") or "Unknown",
-                    "brand": product.get("brands"),
-                    "category": pick_category(categories_tags),
-                    "image_url": product.get("image_front_small_url") or product.get("image_url"),
-                    "quantity_info": product.get("quantity"),  # e.g., "500g"
-                }
-            return None
+        # shield: one caller giving up must not cancel the fetch for the others
+        return await asyncio.shield(_inflight.task(barcode, lambda: _fetch_and_cache(barcode)))
     except Exception as e:
         print(f"Error looking up barcode {barcode}: {e}")
-        return None
+        return entry.data if entry else None
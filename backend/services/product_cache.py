@@ -0,0 +1,64 @@
+"""Persistent cache of Open Food Facts lookups, kept in the product_cache table."""
+import json
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from config import OFF_CACHE_TTL, OFF_NEGATIVE_CACHE_TTL, OFF_CACHE_STALE_TTL
+from database import SessionLocal
+from models import ProductCache
+
+FRESH = "fresh"
+STALE = "stale"  # past its TTL but still servable while a refresh runs
+EXPIRED = "expired"  # only used as a fallback when OFF is unreachable
+
+stats = {"hits": 0, "negative_hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+
+
+class CacheEntry(NamedTuple):
+    data: Optional[dict]  # None for a cached "not found"
+    state: str
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def get(barcode: str) -> Optional[CacheEntry]:
+    """Return the cached lookup for a barcode, classified by age, and count the hit or miss."""
+    with SessionLocal() as db:
+        row = db.get(ProductCache, barcode)
+        if row is None:
+            stats["misses"] += 1
+            return None
+
+        ttl = OFF_CACHE_TTL if row.found else OFF_NEGATIVE_CACHE_TTL
+        age = (_utcnow() - row.fetched_at).total_seconds()
+        data = json.loads(row.data) if row.found and row.data else None
+
+    if age < ttl:
+        stats["hits" if data is not None else "negative_hits"] += 1
+        return CacheEntry(data, FRESH)
+    if age < ttl + OFF_CACHE_STALE_TTL:
+        stats["stale_hits"] += 1
+        return CacheEntry(data, STALE)
+    stats["misses"] += 1
+    return CacheEntry(data, EXPIRED)
+
+
+def put(barcode: str, data: Optional[dict]):
+    """Store a lookup result; None records that OFF doesn't know the barcode."""
+    with SessionLocal() as db:
+        db.merge(ProductCache(
+            barcode=barcode,
+            found=data is not None,
+            data=json.dumps(data) if data is not None else None,
+            fetched_at=_utcnow(),
+        ))
+        db.commit()
+
+
+def snapshot() -> dict:
+    """Counters plus hit rate, for the stats endpoint."""
+    lookups = stats["hits"] + stats["negative_hits"] + stats["stale_hits"] + stats["misses"]
+    served = lookups - stats["misses"]
+    return {**stats, "hit_rate": round(served / lookups, 3) if lookups else None}
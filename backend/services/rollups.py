@@ -0,0 +1,147 @@
+"""
+Daily rollups of scan history, for the analytics endpoints.
+
+scan_history rows are folded incrementally into scan_daily_rollups (one row per
+day, barcode and action), tracked by a watermark on the scan_history id, so
+queries read a small pre-aggregated table. A background task folds new rows in
+every ALMNTSHN_ROLLUP_INTERVAL seconds, so reading analytics never writes, and
+once a day deletes raw rows past the retention period that have been folded in,
+keeping scan_history bounded.
+"""
+import asyncio
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, select, delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from config import ROLLUP_INTERVAL, SCAN_HISTORY_RETENTION_DAYS
+from database import SessionLocal
+from models import ScanHistory, ScanDailyRollup, RollupState
+
+COMPACT_INTERVAL = 24 * 3600  # seconds
+
+_maintainer: Optional[asyncio.Task] = None
+
+
+def refresh_rollups(db: Session) -> int:
+    """Fold scan_history rows added since the last refresh into the daily rollups.
+    Commits; returns the number of raw rows folded in."""
+    state = db.get(RollupState, 1)
+    high = db.scalar(select(func.max(ScanHistory.id)))
+    if high is None or (state is not None and high <= state.last_scan_id):
+        db.rollback()  # nothing new: checked without taking the write lock
+        return 0
+
+    # A write first, so the transaction holds SQLite's write lock before it reads
+    # the watermark: concurrent refreshes (threads, or other worker processes)
+    # run one after the other instead of folding the same rows in twice.
+    db.execute(insert(RollupState).values(id=1, last_scan_id=0).on_conflict_do_nothing())
+    state = db.get(RollupState, 1, populate_existing=True)
+    low = state.last_scan_id
+    high = db.scalar(select(func.max(ScanHistory.id)))
+    if high is None or high <= low:
+        db.commit()
+        return 0
+
+    new_rows = select(
+        func.date(ScanHistory.timestamp),
+        ScanHistory.barcode,
+        ScanHistory.action,
+        func.count(),
+        func.coalesce(func.sum(ScanHistory.quantity), 0),
+    ).where(ScanHistory.id > low, ScanHistory.id <= high).group_by(
+        func.date(ScanHistory.timestamp), ScanHistory.barcode, ScanHistory.action
+    )
+    stmt = insert(ScanDailyRollup).from_select(
+        ["day", "barcode", "action", "scans", "quantity"], new_rows
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "barcode", "action"],
+        set_={
+            "scans": ScanDailyRollup.scans + stmt.excluded.scans,
+            "quantity": ScanDailyRollup.quantity + stmt.excluded.quantity,
+        },
+    )
+    result = db.execute(stmt)
+    state.last_scan_id = high
+    db.commit()
+    return result.rowcount
+
+
+def compact_scan_history(db: Session, retention_days: int = SCAN_HISTORY_RETENTION_DAYS) -> int:
+    """Delete raw scans older than retention_days that are already in the rollups.
+    Returns the number of rows deleted."""
+    refresh_rollups(db)
+    state = db.get(RollupState, 1)
+    if retention_days <= 0 or state is None:  # None: no scans yet
+        return 0
+    watermark = state.last_scan_id
+    cutoff = datetime.combine(today() - timedelta(days=retention_days), time())
+    # Never delete the newest row: without AUTOINCREMENT SQLite would hand out
+    # its id again, below the watermark, and the new scan would be skipped.
+    newest = select(func.max(ScanHistory.id)).scalar_subquery()
+    result = db.execute(
+        delete(ScanHistory).where(
+            ScanHistory.id <= watermark,
+            ScanHistory.id < newest,
+            ScanHistory.timestamp < cutoff,
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def today() -> date:
+    """Days are UTC days, like the CURRENT_TIMESTAMP scan timestamps."""
+    return datetime.now(timezone.utc).date()
+
+
+def since(days: int) -> date:
+    """First day of a window of `days` days ending today."""
+    return today() - timedelta(days=days - 1)
+
+
+def _refresh():
+    with SessionLocal() as db:
+        refresh_rollups(db)
+
+
+def _compact():
+    with SessionLocal() as db:
+        deleted = compact_scan_history(db)
+    if deleted:
+        print(f"Compacted {deleted} scan history rows into daily rollups")
+
+
+async def _maintain_periodically():
+    loop = asyncio.get_running_loop()
+    compacted_at = None
+    while True:
+        try:
+            if compacted_at is None or loop.time() - compacted_at >= COMPACT_INTERVAL:
+                compacted_at = loop.time()
+                await asyncio.to_thread(_compact)  # refreshes the rollups first
+            else:
+                await asyncio.to_thread(_refresh)
+        except Exception as e:
+            print(f"Error updating scan rollups: {e}")
+        await asyncio.sleep(ROLLUP_INTERVAL)
+
+
+def start():
+    global _maintainer
+    if _maintainer is None:
+        _maintainer = asyncio.create_task(_maintain_periodically())
+
+
+async def stop():
+    global _maintainer
+    if _maintainer is not None:
+        _maintainer.cancel()
+        try:
+            await _maintainer
+        except asyncio.CancelledError:
+            pass
+        _maintainer = None
@@ -0,0 +1,100 @@
+"""
+Scan history logging with write-behind buffering.
+
+In "buffered" mode (the default) scans are queued in memory and a background
+task writes them in batches, once ALMNTSHN_SCAN_LOG_FLUSH_SIZE rows are
+waiting or every ALMNTSHN_SCAN_LOG_FLUSH_INTERVAL seconds, so responses never
+wait on a log write; a crash can lose up to one interval's worth of history.
+The buffer is flushed on shutdown. In "sync" mode rows are added to the
+request's own session and committed with it.
+"""
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from config import SCAN_LOG_DURABILITY, SCAN_LOG_FLUSH_SIZE, SCAN_LOG_FLUSH_INTERVAL
+from database import SessionLocal
+from models import ScanHistory
+
+_buffer: list[dict] = []
+_lock = threading.Lock()  # record() is called from threadpool threads
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wakeup: Optional[asyncio.Event] = None
+_flusher: Optional[asyncio.Task] = None
+
+
+def record(db: Session, barcode: str, action: str, quantity: float = 1):
+    """Log a scan. Without a running flusher (e.g. in scripts) this behaves as in sync mode."""
+    if SCAN_LOG_DURABILITY == "sync" or _flusher is None:
+        db.add(ScanHistory(barcode=barcode, action=action, quantity=quantity))
+        return
+
+    row = {
+        "barcode": barcode,
+        "action": action,
+        "quantity": quantity,
+        "timestamp": datetime.now(timezone.utc).replace(tzinfo=None),  # as CURRENT_TIMESTAMP
+    }
+    with _lock:
+        _buffer.append(row)
+        full = len(_buffer) >= SCAN_LOG_FLUSH_SIZE
+    if full:
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+def flush() -> int:
+    """Write out everything buffered in one transaction; returns the row count."""
+    with _lock:
+        rows = _buffer[:]
+        _buffer.clear()
+    if not rows:
+        return 0
+    try:
+        with SessionLocal() as db:
+            db.execute(insert(ScanHistory), rows)
+            db.commit()
+    except Exception:
+        with _lock:
+            _buffer[:0] = rows  # keep them for the next attempt
+        raise
+    return len(rows)
+
+
+async def _flush_periodically():
+    while True:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=SCAN_LOG_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        try:
+            await asyncio.to_thread(flush)
+        except Exception as e:
+            print(f"Error writing scan history: {e}")
+
+
+def start():
+    global _loop, _wakeup, _flusher
+    if SCAN_LOG_DURABILITY == "sync" or _flusher is not None:
+        return
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    _flusher = asyncio.create_task(_flush_periodically())
+
+
+async def stop():
+    """Stop the flusher and write out whatever is still buffered."""
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        try:
+            await _flusher
+        except asyncio.CancelledError:
+            pass
+        _flusher = None
+    await asyncio.to_thread(flush)
@@ -0,0 +1,85 @@
+"""
+Full-text search over item name, brand and category, using an SQLite FTS5
+index (items_fts) that triggers keep in sync with the items table.
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.engine import Engine
+
+# External-content FTS5 table: stores only the index, reads text from items.
+# prefix='2 3' precomputes short prefixes so type-ahead queries stay cheap.
+SEARCH_DDL = {
+    "items_fts": """
+        CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+            name, brand, category,
+            content='items', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """,
+    "items_fts_insert": """
+        CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+            INSERT INTO items_fts (rowid, name, brand, category)
+            VALUES (new.id, new.name, new.brand, new.category);
+        END
+    """,
+    "items_fts_delete": """
+        CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+            INSERT INTO items_fts (items_fts, rowid, name, brand, category)
+            VALUES ('delete', old.id, old.name, old.brand, old.category);
+        END
+    """,
+    "items_fts_update": """
+        CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF name, brand, category ON items BEGIN
+            INSERT INTO items_fts (items_fts, rowid, name, brand, category)
+            VALUES ('delete', old.id, old.name, old.brand, old.category);
+            INSERT INTO items_fts (rowid, name, brand, category)
+            VALUES (new.id, new.name, new.brand, new.category);
+        END
+    """,
+}
+
+# Column weights for bm25(): a hit in the name counts most, category least
+RANK_WEIGHTS = (10.0, 5.0, 1.0)
+
+items_fts = table("items_fts", column("rowid"))
+
+
+def ensure_search_index(engine: Engine):
+    """Create the index and its triggers if missing, rebuilding the index when
+    anything was missing (e.g. a new database, or items rebuilt by a migration)."""
+    with engine.begin() as conn:
+        existing = {
+            row[0] for row in conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE name IN (%s)" % ",".join("?" * len(SEARCH_DDL)),
+                tuple(SEARCH_DDL),
+            )
+        }
+        for statement in SEARCH_DDL.values():
+            conn.exec_driver_sql(statement)
+        if existing != set(SEARCH_DDL):
+            conn.exec_driver_sql("INSERT INTO items_fts (items_fts) VALUES ('rebuild')")
+
+
+def match_query(term: str) -> Optional[str]:
+    """Turn free text into an FTS5 query matching every word as a prefix
+    ("pea but" finds "Peanut Butter"). None if there are no words."""
+    words = re.findall(r"\w+", term.lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def ranked_matches(term: str):
+    """Subquery of (item_id, rank) for items matching term, best match having
+    the lowest rank. None if the term has nothing to search for."""
+    query = match_query(term)
+    if query is None:
+        return None
+    fts = literal_column("items_fts")
+    return (
+        select(items_fts.c.rowid.label("item_id"), func.bm25(fts, *RANK_WEIGHTS).label("rank"))
+        .where(fts.op("MATCH")(query))
+        .subquery()
+    )
@@ -0,0 +1,260 @@
+"""
+Similar-items engine: ranks in-stock items by what they share with a product,
+over every item in one vectorized pass.
+
+Each item is a sparse vector of weighted features: its OFF category tag, the
+words of that tag ("en:plant-based-spreads" -> plant, based, spreads) and of
+its name, and its brand. For every feature the engine keeps a NumPy array of
+the rows (items) that have it, so ranking is one np.bincount over the postings
+of the product's few features (cosine similarity, rarer features counting for
+more), masked to in-stock items and cut to the top SIMILAR_ITEMS_LIMIT with a
+partial sort.
+
+The index is loaded in the background at startup (or on first use) and kept
+current from the item_changes log (see changes.py): sync() reloads just the
+items changed since the data version it last saw. Without NumPy, available()
+is False and the scan endpoints keep matching on exact category equality.
+"""
+import importlib.util
+import math
+import re
+import threading
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config import SIMILAR_ITEMS_LIMIT
+from database import SessionLocal
+from models import DataVersion, Inventory, Item, ItemChange
+
+np = None  # optional: pip install numpy; imported by the first sync(), off the startup path
+
+CATEGORY_WEIGHT = 2.0  # the exact category tag
+WORD_WEIGHT = 1.0  # a word of the name or category
+BRAND_WEIGHT = 0.5
+MIN_SCORE = 0.05  # below this, items only share a very common word
+
+_WORD = re.compile(r"[^\W\d_]{2,}")  # letters only: drops sizes, codes and "en"
+
+_lock = threading.Lock()
+_version: Optional[int] = None  # data version the index reflects; None until loaded
+_vocab: dict[str, int] = {}  # feature -> feature id
+_feature_weights: list[float] = []  # by feature id
+_postings: list[list[int]] = []  # feature id -> rows having it
+_arrays: dict[int, "np.ndarray"] = {}  # feature id -> postings as an array, rebuilt after a change
+_row_of: dict[int, int] = {}  # item id -> row
+_row_of_barcode: dict[str, int] = {}
+_barcode_of_row: dict[int, str] = {}
+_row_features: list[tuple] = []  # row -> feature ids
+_free_rows: list[int] = []
+_item_ids = _in_stock = _norms = None  # per-row arrays, grown as needed
+
+stats = {"queries": 0, "syncs": 0, "items_reloaded": 0}
+
+
+def available() -> bool:
+    return SIMILAR_ITEMS_LIMIT > 0 and importlib.util.find_spec("numpy") is not None
+
+
+def version() -> Optional[int]:
+    return _version
+
+
+def start():
+    """Load the index in a background thread, so the first scan doesn't wait for it."""
+    if available():
+        threading.Thread(target=_load, name="similarity-load", daemon=True).start()
+
+
+def _load():
+    with SessionLocal() as db:
+        sync(db)
+
+
+def _words(text: str) -> list[str]:
+    # crude plural folding, so the "milks" category matches "Oat milk"
+    return [word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+            for word in _WORD.findall(text.lower())]
+
+
+def features(name: Optional[str], brand: Optional[str], category: Optional[str]) -> dict[str, float]:
+    """Feature -> weight for a product."""
+    found = {}
+    if category:
+        found[f"c:{category}"] = CATEGORY_WEIGHT
+        for word in _words(category.split(":", 1)[-1]):
+            found[f"w:{word}"] = WORD_WEIGHT
+    for word in _words(name or ""):
+        found[f"w:{word}"] = WORD_WEIGHT
+    if brand:
+        for part in brand.split(","):  # OFF lists several brands comma-separated
+            if part.strip():
+                found[f"b:{part.strip().lower()}"] = BRAND_WEIGHT
+    return found
+
+
+def _feature_id(feature: str, weight: float) -> int:
+    fid = _vocab.get(feature)
+    if fid is None:
+        fid = _vocab[feature] = len(_feature_weights)
+        _feature_weights.append(weight)
+        _postings.append([])
+    return fid
+
+
+def _grow(rows: int):
+    global _item_ids, _in_stock, _norms
+    capacity = 1024 if _item_ids is None else len(_item_ids)
+    while capacity < rows:
+        capacity *= 2
+    if _item_ids is None or capacity > len(_item_ids):
+        old = 0 if _item_ids is None else len(_item_ids)
+        item_ids = np.full(capacity, -1, dtype=np.int64)
+        in_stock = np.zeros(capacity, dtype=bool)
+        norms = np.ones(capacity, dtype=np.float64)
+        if old:
+            item_ids[:old], in_stock[:old], norms[:old] = _item_ids, _in_stock, _norms
+        _item_ids, _in_stock, _norms = item_ids, in_stock, norms
+
+
+def _remove(item_id: int):
+    row = _row_of.pop(item_id, None)
+    if row is None:
+        return
+    for fid in _row_features[row]:
+        _postings[fid].remove(row)
+        _arrays.pop(fid, None)
+    _row_of_barcode.pop(_barcode_of_row.pop(row), None)
+    _row_features[row] = ()
+    _item_ids[row], _in_stock[row], _norms[row] = -1, False, 1.0
+    _free_rows.append(row)
+
+
+def _put(item_id: int, barcode: str, name, brand, category, quantity: Optional[float]):
+    """Add or update one item's row."""
+    fids = tuple(sorted(_feature_id(f, w) for f, w in features(name, brand, category).items()))
+    row = _row_of.get(item_id)
+    if row is not None and _row_features[row] != fids:
+        _remove(item_id)
+        row = None
+    if row is None:
+        if _free_rows:
+            row = _free_rows.pop()
+        else:
+            row = len(_row_features)
+            _row_features.append(())
+            _grow(row + 1)
+        for fid in fids:
+            _postings[fid].append(row)
+            _arrays.pop(fid, None)
+        _row_features[row] = fids
+        _row_of[item_id] = row
+        _item_ids[row] = item_id
+        _norms[row] = math.sqrt(sum(_feature_weights[fid] ** 2 for fid in fids)) or 1.0
+    if _barcode_of_row.get(row) != barcode:
+        _row_of_barcode.pop(_barcode_of_row.get(row), None)
+        _barcode_of_row[row] = barcode
+        _row_of_barcode[barcode] = row
+    _in_stock[row] = quantity is not None and quantity > 0
+
+
+ROWS_QUERY = select(
+    Item.id, Item.barcode, Item.name, Item.brand, Item.category, Inventory.quantity
+).outerjoin(Inventory, Inventory.item_id == Item.id)
+
+
+def sync(db: Session, known_version: Optional[int] = None):
+    """Bring the index up to the current data version: a full load the first
+    time, after that only the items changed since the last sync.
+    known_version saves the version query if the caller has just read it."""
+    global _version, np
+    with _lock:
+        if np is None:
+            import numpy as np
+        current = known_version
+        if current is None:
+            current = db.scalar(select(DataVersion.version).where(DataVersion.id == 1)) or 0
+        if _version is not None and current == _version:
+            return
+        if _version is None:
+            rows = db.execute(ROWS_QUERY).all()
+            changed = None
+        else:
+            changed = set(db.scalars(select(ItemChange.item_id).where(ItemChange.version > _version)))
+            rows = db.execute(ROWS_QUERY.where(Item.id.in_(changed))).all() if changed else []
+        for row in rows:
+            _put(*row)
+        if changed:
+            for item_id in changed - {row[0] for row in rows}:
+                _remove(item_id)
+        _version = current
+        stats["syncs"] += 1
+        stats["items_reloaded"] += len(rows)
+
+
+def _postings_array(fid: int) -> "np.ndarray":
+    array = _arrays.get(fid)
+    if array is None:
+        array = _arrays[fid] = np.array(_postings[fid], dtype=np.int64)
+    return array
+
+
+def _rank(query: list[tuple[int, float]], query_norm: float, exclude_row: Optional[int],
+          limit: int) -> list[tuple[int, float]]:
+    """Top rows by cosine similarity to query, a list of (feature id, weight)."""
+    stats["queries"] += 1
+    live = len(_row_of)
+    if not query or not live:
+        return []
+    idf_scale = math.log(1 + live)
+    rows, weights = [], []
+    for fid, weight in query:
+        postings = _postings_array(fid)
+        if len(postings):
+            idf = math.log(1 + live / len(postings)) / idf_scale  # in (0, 1]
+            rows.append(postings)
+            weights.append(np.full(len(postings), weight * _feature_weights[fid] * idf))
+    if not rows:
+        return []
+    size = len(_row_features)
+    scores = np.bincount(np.concatenate(rows), weights=np.concatenate(weights), minlength=size)
+    scores /= query_norm * _norms[:size]
+    scores[~_in_stock[:size]] = 0
+    if exclude_row is not None:
+        scores[exclude_row] = 0
+    candidates = np.flatnonzero(scores >= MIN_SCORE)
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(scores[candidates], -limit)[-limit:]]
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return [(int(_item_ids[row]), round(float(scores[row]), 3)) for row in candidates]
+
+
+def similar_to_item(barcode: str, limit: int = SIMILAR_ITEMS_LIMIT) -> Optional[list[tuple[int, float]]]:
+    """(item id, score) of the in-stock items most like a known item, best
+    first; None if the index doesn't have the barcode (not loaded, or stale)."""
+    with _lock:
+        row = _row_of_barcode.get(barcode)
+        if row is None:
+            return None
+        query = [(fid, _feature_weights[fid]) for fid in _row_features[row]]
+        return _rank(query, _norms[row], row, limit)
+
+
+def similar_to(name: Optional[str], brand: Optional[str], category: Optional[str],
+               limit: int = SIMILAR_ITEMS_LIMIT) -> list[tuple[int, float]]:
+    """(item id, score) of the in-stock items most like a product, best first."""
+    wanted = features(name, brand, category)
+    with _lock:
+        query = [(_vocab[f], w) for f, w in wanted.items() if f in _vocab]
+        return _rank(query, math.sqrt(sum(w * w for w in wanted.values())) or 1.0, None, limit)
+
+
+def snapshot() -> dict:
+    return {
+        **stats,
+        "available": available(),
+        "items": len(_row_of),
+        "features": len(_vocab),
+        "version": _version,
+    }
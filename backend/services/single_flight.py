@@ -0,0 +1,27 @@
+"""Concurrent calls for the same key share one in-flight task."""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """In-flight tasks by key; a task is forgotten as soon as it finishes."""
+
+    def __init__(self):
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tasks
+
+    def task(self, key: Hashable, start: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Return the in-flight task for key, starting start() as one if there is none.
+        Await it through asyncio.shield: one caller giving up must not cancel it for the others."""
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.create_task(start())
+            task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        self._tasks.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here so it isn't reported if every waiter gave up
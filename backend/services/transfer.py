@@ -0,0 +1,194 @@
+"""
+Bulk export and import of items with their inventory, as NDJSON or CSV.
+
+Export streams rows from a single read transaction in batches, so memory stays
+flat however large the inventory is. Import reads records one at a time and
+upserts them by barcode in chunked transactions: each chunk is a SELECT of the
+known barcodes plus one executemany upsert into items and one into inventory.
+Fields missing or empty in a record keep their current value; new items without
+a name get "Unknown (<barcode>)", as in quick-add.
+"""
+import csv
+import io
+import json
+import math
+from typing import IO, Iterable, Iterator
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Engine
+
+from models import Item, Inventory
+
+FORMATS = ("ndjson", "csv")
+FIELDS = ["barcode", "name", "brand", "category", "image_url", "unit", "quantity", "location"]
+ITEM_FIELDS = ["name", "brand", "category", "image_url", "unit"]
+EXPORT_BATCH = 1000  # rows fetched (and emitted) at a time
+IMPORT_CHUNK = 1000  # records per transaction
+MAX_ERRORS = 100  # errors reported back; the rest are only counted
+
+EXPORT_QUERY = select(
+    Item.barcode, Item.name, Item.brand, Item.category, Item.image_url, Item.unit,
+    Inventory.quantity, Inventory.location,
+).outerjoin(Inventory, Inventory.item_id == Item.id).order_by(Item.id)
+
+
+def export_rows(engine: Engine) -> Iterator[list]:
+    """All items (quantity None if never stocked) in batches of EXPORT_BATCH rows."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH).execute(EXPORT_QUERY)
+        for batch in result.partitions():
+            yield batch
+
+
+def export_ndjson(engine: Engine) -> Iterator[str]:
+    for batch in export_rows(engine):
+        yield "".join(json.dumps(dict(zip(FIELDS, row))) + "\n" for row in batch)
+
+
+def export_csv(engine: Engine) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for batch in export_rows(engine):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # header only, for an empty database
+        yield buffer.getvalue()
+
+
+def export_stream(engine: Engine, fmt: str) -> Iterator[str]:
+    return export_csv(engine) if fmt == "csv" else export_ndjson(engine)
+
+
+def read_ndjson(file: IO[str]) -> Iterator[tuple[int, object]]:
+    """(line number, record) per non-blank line; the record is an error message
+    string if the line isn't a JSON object."""
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, f"invalid JSON: {e}"
+            continue
+        yield number, record if isinstance(record, dict) else "expected a JSON object"
+
+
+def read_csv(file: IO[str]) -> Iterator[tuple[int, object]]:
+    """(line number, record) per CSV row, with a header row naming the fields."""
+    reader = csv.DictReader(file)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def read_records(file: IO[str], fmt: str) -> Iterator[tuple[int, object]]:
+    return read_csv(file) if fmt == "csv" else read_ndjson(file)
+
+
+def clean_record(record: dict) -> dict:
+    """Known fields with empty values dropped and quantity parsed; raises ValueError."""
+    clean = {}
+    for field in FIELDS:
+        value = record.get(field)
+        if value is None or value == "":
+            continue
+        if field == "quantity":
+            value = float(value)
+            if not math.isfinite(value):
+                raise ValueError("quantity must be a finite number")
+            if value < 0:
+                raise ValueError("quantity must not be negative")
+        else:
+            value = str(value).strip()
+        clean[field] = value
+    if not clean.get("barcode"):
+        raise ValueError("missing barcode")
+    return clean
+
+
+def import_records(engine: Engine, records: Iterable[tuple[int, object]], chunk_size: int = IMPORT_CHUNK) -> dict:
+    """Upsert records by barcode, committing every chunk_size records.
+
+    A barcode repeated within a chunk keeps its last record. Returns counts of
+    created and updated items plus the first MAX_ERRORS per-line errors; a
+    failing record is skipped, not the whole import.
+    """
+    summary = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+    chunk = {}
+    for number, record in records:
+        try:
+            if isinstance(record, str):
+                raise ValueError(record)
+            clean = clean_record(record)
+        except (TypeError, ValueError) as e:
+            summary["failed"] += 1
+            if len(summary["errors"]) < MAX_ERRORS:
+                summary["errors"].append({"line": number, "error": str(e)})
+            continue
+        chunk.pop(clean["barcode"], None)  # keep the last record, in file order
+        chunk[clean["barcode"]] = clean
+        if len(chunk) >= chunk_size:
+            _upsert_chunk(engine, list(chunk.values()), summary)
+            chunk = {}
+    if chunk:
+        _upsert_chunk(engine, list(chunk.values()), summary)
+    return summary
+
+
+def _upsert_chunk(engine: Engine, records: list, summary: dict):
+    barcodes = [r["barcode"] for r in records]
+    with engine.begin() as conn:
+        known = set(conn.scalars(select(Item.barcode).where(Item.barcode.in_(barcodes))))
+
+        item_rows = []
+        for r in records:
+            row = {"barcode": r["barcode"], **{field: r.get(field) for field in ITEM_FIELDS}}
+            if row["barcode"] in known:
+                row["name"] = row["name"] or ""  # NOT NULL is checked before the upsert; see below
+            else:
+                row["name"] = row["name"] or f"Unknown ({row['barcode']})"
+                row["unit"] = row["unit"] or "pcs"
+            item_rows.append(row)
+        stmt = insert(Item)
+        items = Item.__table__.c
+        new_values = {
+            field: func.coalesce(func.nullif(stmt.excluded[field], ""), items[field]) for field in ITEM_FIELDS
+        }
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=[Item.barcode],
+            set_={**new_values, "updated_at": func.now()},
+            # unchanged rows are left alone, so re-importing a file is cheap
+            where=or_(*(value.is_distinct_from(items[field]) for field, value in new_values.items())),
+        ), item_rows)
+
+        stocked = [r for r in records if "quantity" in r or "location" in r]
+        if stocked:
+            ids = dict(conn.execute(
+                select(Item.barcode, Item.id).where(Item.barcode.in_([r["barcode"] for r in stocked]))
+            ).all())
+            inventory_rows = [
+                {"item_id": ids[r["barcode"]], "quantity": r.get("quantity"), "location": r.get("location")}
+                for r in stocked
+            ]
+            stmt = insert(Inventory)
+            inventory = Inventory.__table__.c
+            new_values = {
+                field: func.coalesce(stmt.excluded[field], inventory[field]) for field in ("quantity", "location")
+            }
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[Inventory.item_id],
+                set_={**new_values, "updated_at": func.now()},
+                where=or_(*(value.is_distinct_from(inventory[field]) for field, value in new_values.items())),
+            ), inventory_rows)
+            location_only = [ids[r["barcode"]] for r in stocked if "quantity" not in r]
+            if location_only:
+                # new inventory rows from records with only a location
+                conn.execute(update(Inventory).where(
+                    Inventory.item_id.in_(location_only), Inventory.quantity.is_(None)
+                ).values(quantity=0))
+
+    summary["created"] += len(records) - len(known)
+    summary["updated"] += len(known)
@@ -0,0 +1,22 @@
+"""
+One-time startup work on the data directory, kept apart from the app so
+serve.py can run it before starting the workers without importing FastAPI and
+the routers.
+"""
+import assets
+from config import ASSETS_DIR, DATA_DIR, FRONTEND_DIR
+from database import Base, engine, ensure_indexes
+from services.changes import ensure_change_tracking
+from services.search import ensure_search_index
+
+
+def prepare():
+    """Create the data directory, tables, indexes, search index and
+    change-tracking triggers if missing, and build the frontend."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    Base.metadata.create_all(bind=engine)
+    ensure_indexes(engine)
+    ensure_search_index(engine)
+    ensure_change_tracking(engine)
+    # Fingerprint and precompress the frontend
+    assets.build(FRONTEND_DIR, ASSETS_DIR)
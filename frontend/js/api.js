@@ -2,6 +2,28 @@
 
 const API_BASE = '/api';
 
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+// POST a quantity change with an Idempotency-Key, retrying once with the same
+// key if the network drops: the server applies the change at most once
+async function postChange(path, body) {
+    const options = {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': newIdempotencyKey() },
+        body: JSON.stringify(body)
+    };
+    try {
+        return await fetch(`${API_BASE}${path}`, options);
+    } catch (error) {
+        return fetch(`${API_BASE}${path}`, options);
+    }
+}
+
 const api = {
     // Scan a barcode (check if we have it)
     async scan(barcode) {
@@ -15,37 +37,59 @@ const api = {
 
     // Quick add (scan and add 1)
     async quickAdd(barcode, name = null) {
-        const response = await fetch(`${API_BASE}/inventory/quick-add`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ barcode, name })
-        });
+        const response = await postChange('/inventory/quick-add', { barcode, name });
         return response.json();
     },
 
     // Adjust quantity
     async adjustQuantity(barcode, delta) {
-        const response = await fetch(`${API_BASE}/inventory/adjust`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ barcode, delta })
-        });
+        const response = await postChange('/inventory/adjust', { barcode, delta });
         if (!response.ok) {
             throw new Error('Failed to adjust quantity');
         }
         return response.json();
     },
 
-    // Get inventory list
+    // Apply many quantity changes in one request: [{barcode, delta, name?}, ...]
+    async batch(operations) {
+        const response = await postChange('/inventory/batch', { operations });
+        if (!response.ok) {
+            throw new Error('Failed to apply batch');
+        }
+        return response.json();
+    },
+
+    // Get inventory list, with the data version it reflects
     async getInventory(search = null) {
         let url = `${API_BASE}/inventory/`;
         if (search) {
             url += `?search=${encodeURIComponent(search)}`;
         }
+        // The browser revalidates with If-None-Match, so an unchanged list is a 304
         const response = await fetch(url);
+        return {
+            items: await response.json(),
+            version: Number(response.headers.get('X-Inventory-Version'))
+        };
+    },
+
+    // Inventory rows changed since a data version: {version, changed, deleted}, or null to reload
+    async getInventoryChanges(since) {
+        const response = await fetch(`${API_BASE}/inventory/changes?since=${since}`);
+        if (!response.ok) {
+            return null;
+        }
         return response.json();
     },
 
+    // Live change feed (Server-Sent Events); the browser reconnects on its own
+    subscribe({ onChange, onResync }) {
+        const feed = new EventSource(`${API_BASE}/events/`);
+        feed.addEventListener('change', event => onChange(JSON.parse(event.data)));
+        feed.addEventListener('resync', () => onResync());
+        return feed;
+    },
+
     // Create item manually
     async createItem(item) {
         const response = await fetch(`${API_BASE}/items/`, {
@@ -290,11 +290,8 @@ elements.itemForm.addEventListener('submit', async (e) => {
             image_url: currentProductInfo?.image_url || null
         });
         
-        // Add to inventory (quantity - 1 more times since createItem doesn't add inventory)
-        await api.quickAdd(barcode);
-        for (let i = 1; i < quantity; i++) {
-            await api.adjustQuantity(barcode, 1);
-        }
+        // Add to inventory (createItem doesn't add inventory)
+        await api.batch([{ barcode, delta: quantity }]);
         
         hideModal();
         await lookupBarcode(barcode);
@@ -313,15 +310,65 @@ elements.searchInput.addEventListener('input', () => {
     }, 300);
 });
 
+// The list on screen, so a refresh of the same search can fetch only what changed
+let shownInventory = null;  // {search, version, items}
+
 async function loadInventory(search = '') {
     try {
-        const items = await api.getInventory(search);
+        if (shownInventory && shownInventory.search === search && await applyInventoryChanges()) {
+            return;
+        }
+        const { items, version } = await api.getInventory(search);
+        shownInventory = { search, version, items };
         renderInventory(items);
     } catch (err) {
         console.error('Load inventory error:', err);
     }
 }
 
+// Patch the shown list in place; false if it needs a full reload
+// (e.g. a changed item isn't on screen and might now match or reorder)
+async function applyInventoryChanges() {
+    const delta = await api.getInventoryChanges(shownInventory.version);
+    if (!delta) {
+        return false;
+    }
+    const deleted = new Set(delta.deleted);
+    const items = shownInventory.items.filter(inv => !deleted.has(inv.item_id));
+    for (const inv of delta.changed) {
+        const index = items.findIndex(shown => shown.item_id === inv.item_id);
+        if (index === -1) {
+            return false;
+        }
+        items[index] = inv;
+    }
+    if (delta.changed.length || delta.deleted.length) {
+        renderInventory(items);
+    }
+    shownInventory.items = items;
+    shownInventory.version = delta.version;
+    return true;
+}
+
+// Changes made on other phones: refresh the list if it's on screen
+let feedTimeout = null;
+
+function refreshFromFeed(resync) {
+    if (resync) {
+        shownInventory = null;
+    }
+    if (elements.inventoryTab.classList.contains('hidden')) {
+        return;
+    }
+    clearTimeout(feedTimeout);
+    feedTimeout = setTimeout(() => loadInventory(elements.searchInput.value), 200);
+}
+
+api.subscribe({
+    onChange: () => refreshFromFeed(false),
+    onResync: () => refreshFromFeed(true)
+});
+
 function renderInventory(items) {
     if (items.length === 0) {
         elements.inventoryList.innerHTML = `